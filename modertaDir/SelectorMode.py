@@ -1,5 +1,18 @@
-import subprocess
+import argparse
+import copy
+import importlib
 import os
+import shlex
+
+# Menu choice -> (label, preset module). A preset is imported only when it is
+# chosen and runs in this process, so the menu starts without loading the
+# scanner and later choices reuse what the first one imported.
+MODES = {
+    '1': ('Scan 200K Dir', '200k'),
+    '2': ('Scan 1.2M Dir', '1200k'),
+    '3': ('Scan Admin Path Only', 'adminPath'),
+}
+EXIT_CHOICE = str(len(MODES) + 1)
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -16,45 +29,72 @@ def print_menu():
     print("╔═══════════════════════════════════════════╗")
     print("║               Main Menu                   ║")
     print("╠═══════════════════════════════════════════╣")
-    print("║ 1. Scan 200K Dir                          ║")
-    print("║ 2. Scan 1.2M Dir                          ║")
-    print("║ 3. Scan Admin Path Only                   ║")
-    print("║ 4. Run suki.py                            ║")
-    print("║ 5. Exit                                   ║")
+    for choice, (label, _) in MODES.items():
+        print(f"║ {choice}. {label:<39}║")
+    print(f"║ {EXIT_CHOICE}. {'Exit':<39}║")
     print("╚═══════════════════════════════════════════╝")
     print("\033[0m")  # Reset color
 
-def run_file(file_name):
+def run_mode(preset, argv=None):
+    # Each run gets a copy of the preset's config, so nothing one scan changes
+    # carries over to the next in the same session.
+    try:
+        module = importlib.import_module(preset)
+    except ImportError as e:
+        print(f"\033[91mPreset {preset} tidak bisa dimuat: {e}\033[0m")
+        return None
+    from scanEngine import run_preset
     try:
-        subprocess.run(["python", file_name], check=True)
-    except subprocess.CalledProcessError:
-        print(f"\033[91mAn error occurred while running {file_name}\033[0m")
-    except FileNotFoundError:
-        print(f"\033[91mFile {file_name} not found\033[0m")
+        return run_preset(copy.deepcopy(module.config), argv or [])
+    except SystemExit:
+        # Bad arguments; argparse has already said why.
+        return None
+    except Exception as e:
+        print(f"\033[91mAn error occurred while running {preset}: {e}\033[0m")
+        return None
+
+def run_batch(filename):
+    # One scan per line: a preset followed by its arguments, e.g.
+    # "200k https://example.com/ --depth 1". All of them share one interpreter.
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            preset, *argv = shlex.split(line)
+            run_mode(preset, argv)
 
-def main():
+def menu():
     while True:
         clear_screen()
         print_header()
         print_menu()
 
-        choice = input("\033[93mEnter your choice (1-5): \033[0m")
-
-        if choice == '1':
-            run_file("200k.py")
-        elif choice == '2':
-            run_file("1200k.py")
-        elif choice == '3':
-            run_file("adminPath.py")
-        elif choice == '4':
-            run_file("suki.py")
-        elif choice == '5':
+        choice = input(f"\033[93mEnter your choice (1-{EXIT_CHOICE}): \033[0m")
+
+        if choice in MODES:
+            run_mode(MODES[choice][1])
+        elif choice == EXIT_CHOICE:
             print("\033[92mThank you for using IATA.SC. Goodbye!\033[0m")
             break
         else:
-            print("\033[91mInvalid choice. Please enter a number between 1 and 5.\033[0m")
-        
+            print(f"\033[91mInvalid choice. Please enter a number between 1 and {EXIT_CHOICE}.\033[0m")
+
         input("\nPress Enter to continue...")
 
+def main(argv=None):
+    presets = [preset for _, preset in MODES.values()]
+    parser = argparse.ArgumentParser(description="IATA.SC directory scanner; shows the menu without arguments")
+    parser.add_argument("--batch", help="File with one '<preset> <arguments>' line per scan, run one after another")
+    parser.add_argument("mode", nargs='?', choices=presets, help="Run this preset directly")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the preset, see <preset> --help")
+    args = parser.parse_args(argv)
+    if args.batch:
+        run_batch(args.batch)
+    elif args.mode:
+        run_mode(args.mode, args.args)
+    else:
+        menu()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,47 @@
+import time
+
+class AdaptiveLimiter:
+    # AIMD control of in-flight requests: grow while responses stay fast and
+    # clean, halve on overload signals (429/503, timeouts, resets).
+    def __init__(self, maximum, minimum=1, initial=None, decrease=0.5, latency_tolerance=2.0):
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.limit = float(min(maximum, max(self.minimum, initial or 10)))
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.slow_start = True
+        self.latency = None
+        self.base_latency = None
+        self.last_decrease = 0.0
+        self.resume_at = 0.0
+
+    def available(self):
+        return self.in_flight < int(self.limit) and time.monotonic() >= self.resume_at
+
+    def acquire(self):
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+
+    def observe(self, overloaded, latency):
+        now = time.monotonic()
+        if overloaded:
+            # Cut at most once per smoothed round trip, so a burst of failures
+            # from the same window counts as one congestion event.
+            if now - self.last_decrease > (self.latency or 1.0):
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.last_decrease = now
+                self.slow_start = False
+        else:
+            self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+            self.base_latency = self.latency if self.base_latency is None else min(self.base_latency, self.latency)
+            if self.latency <= self.base_latency * self.latency_tolerance:
+                step = 1 if self.slow_start else 1 / self.limit
+                self.limit = min(self.maximum, self.limit + step)
+            else:
+                self.slow_start = False
+
+    def pause(self, seconds):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from aiohttp import web
+from compiledWordlist import iter_wordlist_lines, normalise_entry
+from resultWriter import iter_records
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PRESETS = ('200k', '1200k', 'adminPath')
+ENGINES = ('aiohttp', 'raw')
+CALIBRATION_PATH = re.compile(r'(^|/)[0-9a-f]{16,}[^/]*/?$')
+
+class StandInServer:
+    # Local target for benchmarks. Whether a path is a hit depends only on its
+    # hash, the seed and hit_ratio, so every run sees the same site.
+    def __init__(self, latency=0.0, jitter=0.0, hit_ratio=0.001, soft_404=False, burst_every=0,
+                 burst_length=0, retry_after=1, hit_body=2048, miss_body=256, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.hit_ratio = hit_ratio
+        # Misses answered with a 200 page that echoes the path and a counter.
+        self.soft_404 = soft_404
+        # After every burst_every requests the next burst_length get a 429.
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.hit_body = hit_body
+        self.miss_body = miss_body
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.count = 0
+
+    def options(self):
+        return {name: value for name, value in vars(self).items() if name not in ('random', 'count')}
+
+    def is_hit(self, path):
+        # Random paths like the scanner's calibration probes never exist, as on
+        # a real site; otherwise a probe would now and then calibrate against a
+        # hit page and the hits of its suffix would be taken for misses.
+        if CALIBRATION_PATH.search(path):
+            return False
+        digest = hashlib.blake2b(f"{self.seed}:{path.rstrip('/')}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') < self.hit_ratio * 2 ** 64
+
+    def page(self, text, size):
+        return text + ' ' * max(0, size - len(text))
+
+    async def handle(self, request):
+        self.count += 1
+        if self.burst_every and self.count % self.burst_every >= self.burst_every - self.burst_length:
+            return web.Response(status=429, headers={'Retry-After': str(self.retry_after)})
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        path = request.path
+        if self.is_hit(path):
+            return web.Response(text=self.page(f"<html>Content of {path}</html>", self.hit_body))
+        if self.soft_404:
+            text = f"<html>Sorry, {path} was not found. Request {self.count}</html>"
+            return web.Response(text=self.page(text, self.miss_body))
+        return web.Response(status=404, text=self.page("<html>Not Found</html>", self.miss_body))
+
+    def run(self, port):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        web.run_app(app, host='127.0.0.1', port=port, print=None, access_log=None)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def preset_wordlist(preset):
+    sys.path.insert(0, HERE)
+    config = importlib.import_module(preset).config
+    return os.path.join(HERE, config.wordlist)
+
+def write_wordlist(source, target, words):
+    # The first `words` entries of the preset's list (all of them for 0).
+    count = 0
+    with open(source, encoding='utf-8', errors='replace') as src, open(target, 'w', encoding='utf-8') as dst:
+        for line in src:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            dst.write(line + '\n')
+            count += 1
+            if count == words:
+                break
+    return count
+
+def expected_hits(server, wordlist):
+    # Counted over the entries as the scanner compiles them: normalised, and
+    # each one once however often it is listed.
+    entries = {normalise_entry(line) for line in iter_wordlist_lines(wordlist)} - {None}
+    return sum(1 for entry in entries if server.is_hit('/' + entry.decode('utf-8', 'replace')))
+
+def run_benchmark(server, port, preset, engine, words, timeout):
+    with tempfile.TemporaryDirectory() as workdir:
+        wordlist = os.path.join(workdir, 'wordlist.txt')
+        count = write_wordlist(preset_wordlist(preset), wordlist, words)
+        stats_file = os.path.join(workdir, 'stats.json')
+        output = os.path.join(workdir, 'found.jsonl')
+        command = [sys.executable, os.path.join(HERE, f"{preset}.py"), f"http://127.0.0.1:{port}/",
+                   '--wordlist', wordlist, '--engine', engine, '--stats', stats_file, '--output', output]
+        logging.info(f"Benchmark {preset} ({engine}, {count} words)")
+        result = {'preset': preset, 'engine': engine, 'words': count}
+        with open(os.path.join(workdir, 'scan.log'), 'w') as log:
+            try:
+                result['exit_code'] = subprocess.run(command, cwd=workdir, stdin=subprocess.DEVNULL, stdout=log,
+                                                     stderr=subprocess.STDOUT, timeout=timeout).returncode
+            except subprocess.TimeoutExpired:
+                result['exit_code'] = None
+        if os.path.exists(stats_file):
+            with open(stats_file) as f:
+                result.update(json.load(f))
+        result['hits_expected'] = expected_hits(server, wordlist)
+        result['hits_found'] = sum(1 for _ in iter_records(output))
+        return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmark of the scan presets against a local server")
+    parser.add_argument("--presets", default=','.join(PRESETS), help="Comma separated presets to run")
+    parser.add_argument("--engines", default=','.join(ENGINES), help="Comma separated HTTP engines to run")
+    parser.add_argument("--words", type=int, default=20000, help="Words taken from each wordlist, 0 for all")
+    parser.add_argument("--latency", type=float, default=0.005, help="Server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--hit-ratio", type=float, default=0.001, help="Fraction of paths that exist")
+    parser.add_argument("--soft-404", action='store_true', help="Answer misses with 200 pages")
+    parser.add_argument("--burst-every", type=int, default=0, help="Send a burst of 429s every N requests")
+    parser.add_argument("--burst-length", type=int, default=20, help="Responses in each 429 burst")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of the 429 responses")
+    parser.add_argument("--hit-body", type=int, default=2048, help="Body size of hits in bytes")
+    parser.add_argument("--miss-body", type=int, default=256, help="Body size of misses in bytes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=int, default=600, help="Seconds allowed per run")
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--check", action='store_true',
+                        help="Exit with status 1 unless every run found exactly the expected hits")
+    args = parser.parse_args(argv)
+
+    server = StandInServer(args.latency, args.jitter, args.hit_ratio, args.soft_404, args.burst_every,
+                           args.burst_length, args.retry_after, args.hit_body, args.miss_body, args.seed)
+    port = free_port()
+    process = multiprocessing.Process(target=server.run, args=(port,), daemon=True)
+    process.start()
+    try:
+        if not wait_for_port(port):
+            logging.error("Server benchmark tidak bisa dijalankan.")
+            return None
+        runs = [run_benchmark(server, port, preset, engine, args.words, args.timeout)
+                for preset in args.presets.split(',') for engine in args.engines.split(',')]
+    finally:
+        process.terminate()
+        process.join()
+
+    report = {'server': server.options(), 'cpu_count': multiprocessing.cpu_count(),
+              'python': sys.version.split()[0], 'runs': runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        logging.info(f"Benchmark report saved to '{args.output}'.")
+    else:
+        print(text)
+    if args.check:
+        wrong = [run for run in runs if run['hits_found'] != run['hits_expected']]
+        for run in wrong:
+            logging.error(f"{run['preset']} ({run['engine']}): {run['hits_found']} hits found, "
+                          f"{run['hits_expected']} expected.")
+        if wrong:
+            sys.exit(1)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import sys
+import os
+import hashlib
+import mmap
+import struct
+import logging
+from array import array
+
+# Layout: header (magic, entry count), count + 1 native uint64 offsets into
+# the blob, then every entry's UTF-8 bytes back to back.
+MAGIC = b'DWL1'
+HEADER = struct.Struct('<4s4xQ')
+EXTENSION = '.dwl'
+CHUNK_SIZE = 256
+
+def iter_wordlist_lines(filename):
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                line = line.strip()
+                if line:
+                    yield line
+
+def normalise_entry(line):
+    # Entries are always relative to the base URL: '/admin' and 'admin' are the
+    # same word, and a leading slash would make the join drop the base path.
+    entry = line.lstrip(b'/')
+    if not entry or entry.startswith(b'#'):
+        return None
+    return entry
+
+def normalise_base_url(base_url):
+    return base_url if base_url.endswith('/') else base_url + '/'
+
+def join_url(base_url, entry):
+    return base_url + entry
+
+def parse_suffixes(value):
+    # '.php,.bak,/' -> ['', '.php', '.bak', '/']; the bare word always comes first.
+    if isinstance(value, str):
+        value = value.split(',')
+    suffixes = ['']
+    for suffix in value or ():
+        suffix = suffix.strip()
+        if suffix and suffix not in suffixes:
+            suffixes.append(suffix)
+    return suffixes
+
+def iter_variants(entry, suffixes):
+    # Every variant of a word is produced together, so they go out back to
+    # back. A suffix the word already ends with yields None instead of a
+    # duplicate request, keeping len(suffixes) items per word.
+    for suffix in suffixes:
+        if suffix and entry.endswith(suffix):
+            yield None
+        else:
+            yield entry + suffix
+
+def compiled_path(filename):
+    return os.path.splitext(filename)[0] + EXTENSION
+
+def write_compiled(entries, output):
+    # entries are UTF-8 bytes, written in the order given. Returns the count.
+    offsets = array('Q', [0])
+    tmp = output + '.tmp'
+    with open(tmp, 'wb') as blob:
+        for entry in entries:
+            blob.write(entry)
+            offsets.append(offsets[-1] + len(entry))
+    count = len(offsets) - 1
+    with open(output + '.part', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count))
+        offsets.tofile(f)
+        with open(tmp, 'rb') as blob:
+            while True:
+                chunk = blob.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+    os.remove(tmp)
+    os.replace(output + '.part', output)
+    return count
+
+def compile_wordlist(filename, output=None):
+    output = output or compiled_path(filename)
+    seen = set()
+
+    def unique_entries():
+        for line in iter_wordlist_lines(filename):
+            entry = normalise_entry(line)
+            if entry is None or entry in seen:
+                continue
+            seen.add(entry)
+            yield entry
+
+    count = write_compiled(unique_entries(), output)
+    logging.info(f"Compiled {filename}: {count} unique entries -> {output}")
+    return output
+
+def ensure_compiled(filename):
+    if filename.endswith(EXTENSION):
+        return filename
+    output = compiled_path(filename)
+    if not os.path.exists(output) or os.path.getmtime(output) < os.path.getmtime(filename):
+        compile_wordlist(filename, output)
+    return output
+
+def wordlist_digest(path):
+    # Content hash of a compiled wordlist; a checkpoint keeps it because a
+    # ranked list is rewritten in place with the same entries in another order.
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CompiledWordlist:
+    # Read-only mmap of a compiled wordlist. Every process maps the same pages,
+    # and entries are decoded only when they are handed out.
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a compiled wordlist")
+        self.blob_start = HEADER.size + 8 * (self.count + 1)
+        self.offsets = memoryview(self.mm)[HEADER.size:self.blob_start].cast('Q')
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.raw(index).decode('utf-8', 'replace')
+
+    def raw(self, index):
+        start = self.blob_start + self.offsets[index]
+        end = self.blob_start + self.offsets[index + 1]
+        return self.mm[start:end]
+
+    def iter_range(self, start, end):
+        for index in range(start, min(end, self.count)):
+            yield self[index]
+
+    def num_chunks(self, chunk_size=CHUNK_SIZE):
+        return (self.count + chunk_size - 1) // chunk_size
+
+    def close(self):
+        if getattr(self, 'offsets', None) is not None:
+            self.offsets.release()
+            self.offsets = None
+        self.mm.close()
+        self.file.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    for filename in sys.argv[1:]:
+        compile_wordlist(filename)
@@ -0,0 +1,68 @@
+import json
+import logging
+import multiprocessing
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+class DnsCache:
+    # Addresses of the scanned hosts, resolved in the parent and published to
+    # the workers through shared memory as JSON plus a version number. The
+    # parent resolves again every refresh interval; a host that fails to
+    # resolve keeps the addresses it had. Workers only read, and parse the
+    # JSON again only when the version has moved, so a lookup in the request
+    # path is a dict access.
+    def __init__(self, size=65536):
+        self.buffer = multiprocessing.Array('c', size)
+        self.version = multiprocessing.Value('Q', 0, lock=False)
+        self.entries = {}
+        self.seen_version = None
+        self.addresses = {}
+
+    def resolve(self, hosts, max_workers=16):
+        # Parent side. Returns the number of hosts that resolved.
+        hosts = sorted(set(hosts))
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(hosts) or 1)) as pool:
+            results = list(pool.map(resolve_host, hosts))
+        resolved = 0
+        for host, addresses in zip(hosts, results):
+            if addresses:
+                self.entries[host] = addresses
+                resolved += 1
+            elif host not in self.entries:
+                logging.warning(f"Host {host} tidak bisa di-resolve.")
+        self.publish()
+        return resolved
+
+    def publish(self):
+        data = json.dumps(self.entries, separators=(',', ':')).encode()
+        if len(data) >= len(self.buffer):
+            logging.error(f"DNS cache penuh ({len(data)} bytes), worker me-resolve sendiri.")
+            return
+        with self.buffer.get_lock():
+            self.buffer.value = data
+            self.version.value += 1
+
+    def lookup(self, host):
+        # Worker side: [[family, address], ...] or None for a host the parent
+        # did not resolve.
+        if self.version.value != self.seen_version:
+            with self.buffer.get_lock():
+                data = self.buffer.value
+                self.seen_version = self.version.value
+            self.addresses = json.loads(data) if data else {}
+        return self.addresses.get(host)
+
+def resolve_host(host):
+    try:
+        infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        return None
+    addresses = []
+    for family, _, _, _, sockaddr in infos:
+        if [family, sockaddr[0]] not in addresses:
+            addresses.append([family, sockaddr[0]])
+    return addresses
+
+def refresh_dns(dns, hosts, interval, stop):
+    while not stop.wait(interval):
+        dns.resolve(hosts)
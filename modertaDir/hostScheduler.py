@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from adaptiveLimiter import AdaptiveLimiter
+
+def wake_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+class HostScheduler:
+    # Entries wait in one queue per host and workers are served round-robin
+    # from the hosts whose limiter has a free slot, so a slow or throttled host
+    # only ties up its own slots, never the workers the other hosts could use.
+    def __init__(self, per_host, minimum=1, initial=None, read_ahead=200, max_pending=16384):
+        self.per_host = per_host
+        self.minimum = minimum
+        self.initial = initial
+        self.read_ahead = read_ahead
+        self.max_pending = max_pending
+        self.queues = OrderedDict()
+        self.limiters = {}
+        self.pending = 0
+        self.waiters = deque()
+        self.closed = False
+        self.hungry = asyncio.Event()
+
+    def limiter(self, host):
+        limiter = self.limiters.get(host)
+        if limiter is None:
+            limiter = self.limiters[host] = AdaptiveLimiter(self.per_host, self.minimum, self.initial)
+        return limiter
+
+    def put(self, host, item):
+        self.queues.setdefault(host, deque()).append(item)
+        self.pending += 1
+        self.wake()
+
+    def close(self):
+        self.closed = True
+        self.wake_all()
+
+    def wants_items(self):
+        # Read further ahead while workers sit idle because every host with
+        # queued entries is at its limit; the next job may be for another host.
+        if self.pending < self.read_ahead:
+            return True
+        return bool(self.waiters) and self.pending < self.max_pending
+
+    async def wait_for_room(self):
+        while not self.wants_items():
+            self.hungry.clear()
+            await self.hungry.wait()
+
+    def next_item(self):
+        for host, items in self.queues.items():
+            limiter = self.limiter(host)
+            if limiter.available():
+                limiter.acquire()
+                item = items.popleft()
+                self.pending -= 1
+                if items:
+                    self.queues.move_to_end(host)
+                else:
+                    del self.queues[host]
+                return host, item
+        return None
+
+    def next_resume(self):
+        # Seconds until a paused host with queued entries may send again.
+        now = time.monotonic()
+        waits = [self.limiters[host].resume_at - now for host in self.queues
+                 if self.limiters[host].resume_at > now]
+        return max(0.0, min(waits)) if waits else None
+
+    async def get(self):
+        # (host, item) with a slot of that host's limiter held, or None once
+        # the scheduler is closed and drained.
+        while True:
+            entry = self.next_item()
+            if self.wants_items():
+                self.hungry.set()
+            if entry is not None:
+                return entry
+            if self.closed and not self.pending:
+                self.wake_all()
+                return None
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self.waiters.append(waiter)
+            if self.wants_items():
+                self.hungry.set()
+            delay = self.next_resume()
+            timer = loop.call_later(delay, wake_waiter, waiter) if delay is not None else None
+            try:
+                await waiter
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                if (timer is not None or not waiter.done()) and waiter in self.waiters:
+                    self.waiters.remove(waiter)
+
+    def release(self, host):
+        self.limiters[host].release()
+        self.wake()
+
+    def wake(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                wake_waiter(waiter)
+                return
+
+    def wake_all(self):
+        while self.waiters:
+            self.wake()
@@ -0,0 +1,124 @@
+import socket
+import time
+import aiohttp
+from aiohttp.abc import AbstractResolver
+from urllib.parse import urlsplit
+
+class FetchResult:
+    # What classification needs from a response: the status, the path it
+    # redirected to, at most max_body bytes of body (None when not read), the
+    # Retry-After delay, the declared Content-Length and the validators a
+    # rescan sends back in conditional requests.
+    __slots__ = ('status', 'location', 'body', 'retry_after', 'length', 'etag', 'last_modified')
+
+    def __init__(self, status, location, body, retry_after=0, length=None, etag=None, last_modified=None):
+        self.status = status
+        self.location = location
+        self.body = body
+        self.retry_after = retry_after
+        self.length = length
+        self.etag = etag
+        self.last_modified = last_modified
+
+def retry_after_seconds(value, maximum=30.0):
+    value = value or ''
+    return min(maximum, float(value)) if value.isdigit() else 0
+
+def redirect_target(response, allow_redirects):
+    if allow_redirects:
+        return urlsplit(str(response.url)).path if response.history else ''
+    return urlsplit(response.headers.get('Location', '')).path
+
+async def release_response(response, max_body):
+    # Small remainders are drained so the keep-alive connection can be reused;
+    # anything larger is dropped with its connection instead of downloaded.
+    # Returns the number of bytes drained.
+    if response.method == 'HEAD':
+        return 0
+    length = response.content_length
+    if length is not None and length <= max_body:
+        return len(await response.read())
+    response.close()
+    return 0
+
+def request_size(method, url, headers):
+    # Approximate: aiohttp adds a few default headers of its own.
+    return len(method) + len(url) + 12 + sum(len(name) + len(value) + 4 for name, value in headers.items())
+
+def head_size(response):
+    return 17 + len(response.reason or '') + sum(len(name) + len(value) + 4 for name, value in response.raw_headers)
+
+def trace_config(stats):
+    # DNS lookups and new connections, timed through aiohttp's trace hooks.
+    trace = aiohttp.TraceConfig()
+
+    async def dns_start(session, context, params):
+        context.dns_started = time.monotonic()
+
+    async def dns_end(session, context, params):
+        stats.phase('dns', time.monotonic() - context.dns_started)
+
+    async def connect_start(session, context, params):
+        context.connect_started = time.monotonic()
+
+    async def connect_end(session, context, params):
+        stats.phase('connect', time.monotonic() - context.connect_started)
+
+    trace.on_dns_resolvehost_start.append(dns_start)
+    trace.on_dns_resolvehost_end.append(dns_end)
+    trace.on_connection_create_start.append(connect_start)
+    trace.on_connection_create_end.append(connect_end)
+    return trace
+
+class CachedResolver(AbstractResolver):
+    # Serves the addresses the parent resolved (see dnsCache.py), so no
+    # lookup happens when a connection opens. Only hosts outside the scan,
+    # such as redirect targets, go to the regular resolver.
+    def __init__(self, dns):
+        self.dns = dns
+        self.fallback = None
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        results = [{'hostname': host, 'host': address, 'port': port, 'family': entry_family,
+                    'proto': 0, 'flags': socket.AI_NUMERICHOST}
+                   for entry_family, address in self.dns.lookup(host) or ()
+                   if family in (socket.AF_UNSPEC, entry_family)]
+        if results:
+            return results
+        if self.fallback is None:
+            self.fallback = aiohttp.DefaultResolver()
+        return await self.fallback.resolve(host, port, family)
+
+    async def close(self):
+        if self.fallback is not None:
+            await self.fallback.close()
+
+class AiohttpEngine:
+    def __init__(self, session, allow_redirects, max_body, stats=None):
+        self.session = session
+        self.allow_redirects = allow_redirects
+        self.max_body = max_body
+        self.stats = stats
+
+    async def fetch(self, method, url, headers, wants_body):
+        # wants_body(status, location) decides whether the body is read at all.
+        started = time.monotonic()
+        async with self.session.request(method, url, ssl=False, headers=headers,
+                                        allow_redirects=self.allow_redirects) as response:
+            head = time.monotonic()
+            location = redirect_target(response, self.allow_redirects)
+            body = None
+            if method != 'HEAD' and wants_body(response.status, location):
+                body = await response.content.read(self.max_body)
+            drained = await release_response(response, self.max_body)
+            if self.stats is not None:
+                self.stats.phase('ttfb', head - started)
+                self.stats.phase('body', time.monotonic() - head)
+                self.stats.transferred(request_size(method, url, headers),
+                                       head_size(response) + len(body or b'') + drained)
+            return FetchResult(response.status, location, body, retry_after_seconds(response.headers.get('Retry-After')),
+                               response.content_length, response.headers.get('ETag'),
+                               response.headers.get('Last-Modified'))
+
+    async def close(self):
+        pass
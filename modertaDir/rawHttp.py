@@ -0,0 +1,430 @@
+import asyncio
+import logging
+import socket
+import ssl
+import time
+from collections import deque
+from urllib.parse import quote, urljoin, urlsplit
+from httpEngine import FetchResult, retry_after_seconds
+
+REDIRECT_STATUS = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10
+MAX_HEAD = 65536
+# Bodies up to this size are read past max_body to keep the connection;
+# beyond it the connection is closed once max_body bytes are in.
+MAX_DRAIN = 65536
+SAFE_PATH = "/%:@!$&'()*+,;=?~"
+SKIPPED_HEADERS = ('host', 'connection', 'accept-encoding', 'content-length')
+
+class RawHttpError(Exception):
+    # The response could not be parsed; the host is handed to aiohttp.
+    pass
+
+class PipelineBroken(ConnectionError):
+    # The connection went away before this request was answered, so it is
+    # safe to send again. graceful is set when the server announced the close
+    # or the engine closed the connection itself.
+    def __init__(self, message, graceful=False, queued=False):
+        super().__init__(message)
+        self.graceful = graceful
+        self.queued = queued
+
+def unverified_context():
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+def encode_request(method, target, host, headers):
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"]
+    lines += [f"{name}: {value}" for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS]
+    # Bodies are fingerprinted as they come, so they must not be compressed.
+    lines.append("Accept-Encoding: identity")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace')
+
+class RawResponse:
+    __slots__ = ('status', 'headers', 'body', 'ttfb', 'transfer')
+
+    def __init__(self, status, headers, ttfb):
+        self.status = status
+        self.headers = headers
+        self.body = bytearray()
+        self.ttfb = ttfb
+        self.transfer = 0.0
+
+class HttpConnection(asyncio.Protocol):
+    # One keep-alive connection. Requests are written back to back without
+    # waiting for the responses, which come back in the same order; only the
+    # status line and the headers needed to find the end of each response are
+    # parsed, and at most max_body bytes of every body are kept.
+    def __init__(self, max_body, stats=None):
+        self.max_body = max_body
+        self.stats = stats
+        self.transport = None
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.outgoing = []
+        self.closed = False
+        self.graceful = False
+        self.response = None
+        self.mode = None
+        self.remaining = 0
+        self.keep_alive = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.closed = True
+        if self.response is not None and self.mode == 'close':
+            self.finish()
+        self.fail_pending(exc)
+
+    def fail_pending(self, exc=None):
+        queued = len(self.pending) > 1
+        while self.pending:
+            _, future, _ = self.pending.popleft()
+            if future.done():
+                continue
+            if isinstance(exc, RawHttpError):
+                future.set_exception(exc)
+            else:
+                future.set_exception(PipelineBroken(f"connection closed: {exc or 'by server'}",
+                                                    self.graceful, queued))
+
+    def send(self, method, request):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((method, future, time.monotonic()))
+        if not self.outgoing:
+            loop.call_soon(self.flush)
+        self.outgoing.append(request)
+        return future
+
+    def flush(self):
+        # Everything queued in one event loop pass goes out in one write.
+        if self.outgoing and not self.closed:
+            self.transport.write(b''.join(self.outgoing))
+        self.outgoing = []
+
+    def abort(self, exc=None):
+        if not self.closed:
+            self.closed = True
+            self.transport.abort()
+        self.fail_pending(exc)
+
+    def data_received(self, data):
+        if self.stats is not None:
+            self.stats.bytes_in += len(data)
+        self.buffer += data
+        try:
+            self.parse()
+        except RawHttpError as e:
+            self.abort(e)
+
+    def parse(self):
+        buffer = self.buffer
+        while self.pending:
+            if self.response is None:
+                end = buffer.find(b'\r\n\r\n')
+                if end < 0:
+                    if len(buffer) > MAX_HEAD:
+                        raise RawHttpError("response head too large")
+                    return
+                head = bytes(buffer[:end])
+                del buffer[:end + 4]
+                self.start_response(head)
+                continue
+            if self.mode == 'length':
+                take = min(self.remaining, len(buffer))
+                self.keep(buffer, take)
+                self.remaining -= take
+                if self.remaining and not self.cut_short():
+                    return
+            elif self.mode == 'chunked':
+                if not self.read_chunks(buffer):
+                    return
+            elif self.mode == 'close':
+                self.keep(buffer, len(buffer))
+                if not self.cut_short():
+                    return
+            self.finish()
+            if self.closed:
+                return
+
+    def start_response(self, head):
+        lines = head.split(b'\r\n')
+        version, _, rest = lines[0].partition(b' ')
+        if not version.startswith(b'HTTP/1.'):
+            raise RawHttpError(f"unexpected status line {lines[0][:40]!r}")
+        try:
+            status = int(rest[:3])
+        except ValueError:
+            raise RawHttpError(f"unexpected status line {lines[0][:40]!r}")
+        if 100 <= status < 200:
+            return
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(b':')
+            if sep:
+                headers[name.strip().lower().decode('latin-1')] = value.strip().decode('latin-1')
+        connection = headers.get('connection', '').lower()
+        if version == b'HTTP/1.1':
+            self.keep_alive = 'close' not in connection
+        else:
+            self.keep_alive = 'keep-alive' in connection
+        method, _, sent = self.pending[0]
+        self.response = RawResponse(status, headers, time.monotonic() - sent)
+        if method == 'HEAD' or status in (204, 304):
+            self.mode = None
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            self.mode = 'chunked'
+            self.chunk_state = 'size'
+        elif 'content-length' in headers:
+            try:
+                self.remaining = int(headers['content-length'])
+            except ValueError:
+                raise RawHttpError("invalid Content-Length")
+            self.mode = 'length'
+            if self.remaining > MAX_DRAIN:
+                self.keep_alive = False
+        else:
+            self.mode = 'close'
+            self.keep_alive = False
+
+    def keep(self, buffer, size):
+        body = self.response.body
+        room = self.max_body - len(body)
+        if room > 0:
+            body += buffer[:min(size, room)]
+        del buffer[:size]
+
+    def cut_short(self):
+        # A connection that is closed after this response anyway does not
+        # need the rest of the body.
+        return not self.keep_alive and len(self.response.body) >= self.max_body
+
+    def read_chunks(self, buffer):
+        while True:
+            if self.chunk_state == 'size':
+                end = buffer.find(b'\r\n')
+                if end < 0:
+                    return False
+                line = bytes(buffer[:end]).split(b';', 1)[0].strip()
+                del buffer[:end + 2]
+                try:
+                    self.remaining = int(line, 16)
+                except ValueError:
+                    raise RawHttpError("invalid chunk size")
+                self.chunk_state = 'data' if self.remaining else 'trailer'
+            elif self.chunk_state == 'data':
+                take = min(self.remaining, len(buffer))
+                self.keep(buffer, take)
+                self.remaining -= take
+                if self.remaining:
+                    return False
+                self.chunk_state = 'end'
+            elif self.chunk_state == 'end':
+                if len(buffer) < 2:
+                    return False
+                del buffer[:2]
+                self.chunk_state = 'size'
+            else:
+                end = buffer.find(b'\r\n')
+                if end < 0:
+                    return False
+                del buffer[:end + 2]
+                if end == 0:
+                    return True
+
+    def finish(self):
+        _, future, sent = self.pending.popleft()
+        self.response.transfer = time.monotonic() - sent - self.response.ttfb
+        if not future.done():
+            future.set_result(self.response)
+        self.response = None
+        self.mode = None
+        if not self.keep_alive and not self.closed:
+            self.closed = True
+            self.graceful = True
+            self.transport.close()
+
+class RawEngine:
+    # Probing with the minimal HTTP/1.1 client above instead of aiohttp. Up to
+    # pipeline requests share a connection, so a host gets at most
+    # max_concurrent / pipeline connections. A host that closes connections
+    # with requests still queued loses pipelining, and one whose responses do
+    # not parse is handed to the fallback engine (aiohttp) for the whole run.
+    # Addresses come from the shared DNS cache when one is given.
+    def __init__(self, fallback, allow_redirects, max_body, timeout, max_concurrent, pipeline=4, stats=None,
+                 dns=None):
+        self.fallback = fallback
+        self.stats = stats
+        self.dns = dns
+        self.allow_redirects = allow_redirects
+        self.max_body = max_body
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self.pipeline = max(1, pipeline)
+        self.pools = {}
+        self.opening = {}
+        self.opened = {}
+        self.depths = {}
+        self.rejected = set()
+        self.ssl = None
+
+    def ssl_context(self):
+        if self.ssl is None:
+            self.ssl = unverified_context()
+        return self.ssl
+
+    async def resolve(self, host, port):
+        if self.dns is not None:
+            entries = self.dns.lookup(host)
+            if entries:
+                return [address for _, address in entries]
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        if self.stats is not None:
+            self.stats.phase('dns', time.monotonic() - started)
+        return [info[4][0] for info in infos]
+
+    async def open_connection(self, key):
+        scheme, host, port = key
+        loop = asyncio.get_running_loop()
+        ssl_context = self.ssl_context() if scheme == 'https' else None
+        error = None
+        for address in await self.resolve(host, port):
+            started = time.monotonic()
+            try:
+                _, connection = await loop.create_connection(
+                    lambda: HttpConnection(self.max_body, self.stats), address, port, ssl=ssl_context,
+                    server_hostname=host if ssl_context else None)
+            except OSError as e:
+                error = e
+                continue
+            if self.stats is not None:
+                self.stats.phase('connect', time.monotonic() - started)
+            return connection
+        raise error or OSError(f"{host} has no address")
+
+    async def connect(self, key):
+        self.opening[key] = self.opening.get(key, 0) + 1
+        try:
+            connection = await asyncio.wait_for(self.open_connection(key), self.timeout)
+            self.pools.setdefault(key, []).append(connection)
+            return connection
+        finally:
+            self.opening[key] -= 1
+            for waiter in self.opened.pop(key, ()):
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def connection(self, key):
+        # An idle connection if there is one, a new one while the host is below
+        # its share, otherwise the least busy one with room in its pipeline.
+        while True:
+            connections = self.pools.get(key)
+            if connections is None:
+                connections = self.pools[key] = []
+            best = None
+            dropped = False
+            for connection in connections:
+                if connection.closed:
+                    dropped = True
+                    continue
+                if not connection.pending:
+                    best = connection
+                    break
+                if best is None or len(connection.pending) < len(best.pending):
+                    best = connection
+            if dropped:
+                connections[:] = [connection for connection in connections if not connection.closed]
+            depth = self.depths.get(key, self.pipeline)
+            opening = self.opening.get(key, 0)
+            if best is not None and not best.pending:
+                return best
+            if len(connections) + opening < -(-self.max_concurrent // depth):
+                return await self.connect(key)
+            if best is not None and len(best.pending) < depth:
+                return best
+            if not opening:
+                return await self.connect(key)
+            # Every connection is full; wait for the ones being opened.
+            waiter = asyncio.get_running_loop().create_future()
+            self.opened.setdefault(key, []).append(waiter)
+            await waiter
+
+    async def send(self, method, url, headers):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == 'https' else 80))
+        target = quote(parts.path or '/', safe=SAFE_PATH)
+        if parts.query:
+            target += '?' + quote(parts.query, safe=SAFE_PATH)
+        request = encode_request(method, target, parts.netloc, headers)
+        for attempt in range(3):
+            connection = await self.connection(key)
+            future = connection.send(method, request)
+            if self.stats is not None:
+                self.stats.bytes_out += len(request)
+            try:
+                response = await asyncio.wait_for(future, self.timeout)
+                if self.stats is not None:
+                    self.stats.phase('ttfb', response.ttfb)
+                    self.stats.phase('body', response.transfer)
+                return response
+            except PipelineBroken as e:
+                if e.queued and not e.graceful and self.depths.get(key, self.pipeline) > 1:
+                    logging.debug(f"{parts.netloc} drops pipelined requests, pipelining disabled")
+                    self.depths[key] = 1
+                if attempt == 2:
+                    raise
+            except asyncio.TimeoutError:
+                # Whatever is queued behind the stalled response is resent; the
+                # server did not drop it, so pipelining stays on.
+                connection.graceful = True
+                connection.abort()
+                raise
+
+    async def fetch_raw(self, method, url, headers):
+        redirected = False
+        for _ in range(MAX_REDIRECTS):
+            response = await self.send(method, url, headers)
+            location = response.headers.get('location')
+            if not (self.allow_redirects and location and response.status in REDIRECT_STATUS):
+                break
+            url = urljoin(url, location)
+            redirected = True
+            if response.status == 303 and method != 'HEAD':
+                method = 'GET'
+        if self.allow_redirects:
+            location = urlsplit(url).path if redirected else ''
+        else:
+            location = urlsplit(response.headers.get('location', '')).path
+        length = response.headers.get('content-length', '')
+        return FetchResult(response.status, location, bytes(response.body),
+                           retry_after_seconds(response.headers.get('retry-after')),
+                           int(length) if length.isdigit() else None, response.headers.get('etag'),
+                           response.headers.get('last-modified'))
+
+    async def fetch(self, method, url, headers, wants_body):
+        # Same contract as AiohttpEngine.fetch; the body is read either way.
+        host = urlsplit(url).netloc
+        if host not in self.rejected:
+            try:
+                return await self.fetch_raw(method, url, headers)
+            except RawHttpError as e:
+                if host not in self.rejected:
+                    logging.warning(f"{host} tidak cocok untuk raw engine ({str(e)}), memakai aiohttp.")
+                    self.rejected.add(host)
+        return await self.fallback.fetch(method, url, headers, wants_body)
+
+    async def close(self):
+        for connections in self.pools.values():
+            for connection in connections:
+                if not connection.closed:
+                    connection.closed = True
+                    connection.transport.close()
+        self.pools.clear()
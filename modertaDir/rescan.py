@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from compiledWordlist import CompiledWordlist, compiled_path, ensure_compiled, normalise_base_url
+from httpEngine import AiohttpEngine
+from responseFingerprint import Calibrator, fingerprint
+from resultStore import ResultStore
+from scanEngine import run_scan
+from scanWorker import user_agent_picker
+from wordRanking import ensure_ranked
+
+RESCAN_WORDLIST = 'rescan_wordlist.txt'
+
+def conditional_headers(config, previous, pick_user_agent=None):
+    headers = dict(config.headers)
+    if pick_user_agent:
+        headers['User-Agent'] = pick_user_agent()
+    if previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+    return headers
+
+def split_hit(url):
+    # The base URL and wordlist entry a hit was scanned as.
+    base = url.rstrip('/').rpartition('/')[0] + '/'
+    return base, url[len(base):]
+
+async def revalidate_one(engine, semaphore, calibrator, config, previous, target, pick_user_agent):
+    # The record carried into the new run, or None when the path is gone. A
+    # 304, or the same ETag from a server that ignores the condition, means
+    # unchanged; a path that cannot be reached is kept rather than reported
+    # as gone, one that now gets the miss page counts as gone.
+    url = previous['url']
+    record = dict(previous, base=target)
+    profile = await calibrator.profile(*split_hit(url)) if calibrator else None
+
+    def wants_body(status, location):
+        return profile is not None and profile.needs_body(status, location)
+
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            method = previous.get('method') or 'GET'
+            headers = conditional_headers(config, previous, pick_user_agent)
+            response = await engine.fetch(method, url, headers, wants_body)
+            if method == 'HEAD' and wants_body(response.status, response.location):
+                # The status alone does not tell this from the miss page.
+                response = await engine.fetch('GET', url, headers, wants_body)
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError) as e:
+            logging.warning(f"Error revalidating {url}: {str(e)}")
+            record['revalidated'] = 'error'
+            return record
+    record.update(latency_ms=round((time.monotonic() - started) * 1000, 1), time=round(time.time(), 3))
+    if response.status == 304 or (response.status in config.found_status and previous.get('etag')
+                                  and response.etag == previous['etag']):
+        record['revalidated'] = 'unchanged'
+        return record
+    if response.status not in config.found_status:
+        return None
+    if wants_body(response.status, response.location) and \
+            profile.matches(fingerprint(response.status, response.location, response.body, urlsplit(url).path)):
+        return None
+    record.update(status=response.status, location=response.location, etag=response.etag,
+                  last_modified=response.last_modified, revalidated='changed')
+    if response.length is not None:
+        record['size'] = response.length
+    return record
+
+async def revalidate(previous, config):
+    # previous maps each target to its hit records from the last finished run.
+    connector = aiohttp.TCPConnector(limit=config.max_concurrent, ssl=False)
+    timeout = aiohttp.ClientTimeout(total=config.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        engine = AiohttpEngine(session, config.allow_redirects, config.max_body)
+        semaphore = asyncio.Semaphore(config.max_concurrent)
+        pick_user_agent = user_agent_picker(config.user_agents)
+        calibrator = Calibrator(engine, config.headers) if config.calibrate else None
+        checks = [revalidate_one(engine, semaphore, calibrator, config, record, target, pick_user_agent)
+                  for target, records in previous.items() for record in records]
+        return await asyncio.gather(*checks)
+
+def rescan_words(store, targets, wordlist_path, sample):
+    # Words of the wordlist not yet scanned below some target, a random sample
+    # fraction of those that were, and the rest of them, in wordlist order.
+    wordlist = CompiledWordlist(wordlist_path)
+    words = list(wordlist.iter_range(0, len(wordlist)))
+    wordlist.close()
+    known = None
+    for target in targets:
+        scanned = store.scanned_words(target)
+        if not scanned:
+            logging.warning(f"Belum ada kata yang tercatat untuk {target}, seluruh wordlist di-scan.")
+        known = scanned if known is None else known & scanned
+    known = known or set()
+    delta = [word for word in words if word not in known]
+    scanned = [word for word in words if word in known]
+    sampled = random.sample(scanned, round(len(scanned) * sample)) if sample else []
+    chosen = set(sampled)
+    return delta, sampled, [word for word in scanned if word not in chosen]
+
+def run_rescan(targets, config, sample=0.0, resume=False):
+    # Re-audit: revalidate the hits of the last finished run with conditional
+    # requests, then scan the targets and the directories already known only
+    # with the new words (and a sample of the old ones). Directories that
+    # first show up in the rescan get the whole wordlist. Everything lands in
+    # a new run of the store, so resultStore.py new/gone show what changed.
+    if not config.store:
+        logging.error("Rescan membutuhkan results store (--store).")
+        return None
+    # The rescan wordlist is put in order here; ranking it again in run_scan
+    # would mix the new words in with the rest.
+    ranking, config.ranking = config.ranking, None
+    if resume:
+        config.wordlist = RESCAN_WORDLIST
+        return run_scan(targets, config, resume=True)
+    if isinstance(targets, str):
+        targets = [targets]
+    targets = [normalise_base_url(target) for target in targets]
+    try:
+        wordlist_path = ensure_compiled(config.wordlist)
+    except FileNotFoundError:
+        logging.error(f"File {config.wordlist} tidak ditemukan.")
+        return None
+    if ranking:
+        wordlist_path = ensure_ranked(wordlist_path, ranking)
+
+    store = ResultStore(config.store)
+    previous = {target: store.last_hits(target) for target in targets}
+    delta, sampled, rest = rescan_words(store, targets, wordlist_path, sample)
+    store.close()
+    logging.info(f"Rescan: {sum(map(len, previous.values()))} hits to revalidate, {len(delta)} new words, "
+                 f"{len(sampled)} sampled.")
+
+    records = [record for record in asyncio.run(revalidate(previous, config)) if record is not None]
+    for state in ('unchanged', 'changed', 'error'):
+        count = sum(1 for record in records if record['revalidated'] == state)
+        if count:
+            logging.info(f"Revalidated {state}: {count}")
+    logging.info(f"Gone: {sum(map(len, previous.values())) - len(records)}")
+
+    with open(RESCAN_WORDLIST, 'w', encoding='utf-8') as f:
+        for word in delta + sampled + rest:
+            f.write(word + '\n')
+    if os.path.exists(compiled_path(RESCAN_WORDLIST)):
+        # Recompiled even when written within the same mtime tick.
+        os.remove(compiled_path(RESCAN_WORDLIST))
+    config.wordlist = RESCAN_WORDLIST
+    return run_scan(targets, config, seed=records, limit=len(delta) + len(sampled))
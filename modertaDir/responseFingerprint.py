@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import secrets
+from urllib.parse import unquote, urlsplit
+from compiledWordlist import join_url
+
+DIGITS = re.compile(rb'\d+')
+WHITESPACE = re.compile(rb'\s+')
+MAX_BODY = 8192
+CALIBRATION_PROBES = 3
+
+def suffix_key(directory):
+    if directory.endswith('/'):
+        return '/'
+    return os.path.splitext(directory.rsplit('/', 1)[-1])[1].lower()
+
+def strip_echo(text, echo):
+    # The echo is also a piece of markup for words like 'html' or 'a'
+    # ('</html>', '</a>'), so it is only cut where it is not closing a tag or
+    # running on into a longer path.
+    if not echo or echo not in text:
+        return text
+    opening, joiners = (b'<', b'_/-') if isinstance(text, bytes) else ('<', '_/-')
+    parts = text.split(echo)
+    pieces = [parts[0]]
+    last = parts[0][-1:]
+    for part in parts[1:]:
+        following = part[:1]
+        if last == opening or (following and (following.isalnum() or following in joiners)):
+            pieces.append(echo)
+            last = echo[-1:]
+        pieces.append(part)
+        last = part[-1:] or last
+    return echo[:0].join(pieces)
+
+def fingerprint(status, location, body, echo):
+    # Pages that reflect the requested path or embed counters/timestamps still
+    # collapse to one fingerprint once those parts are removed. Whitespace is
+    # left out as well, so padding that makes up for the length of the echo
+    # does not tell them apart either. The path is requested percent-encoded
+    # but usually echoed decoded, so both forms are cut.
+    for form in dict.fromkeys((echo, unquote(echo))):
+        body = strip_echo(body, form.encode())
+        location = strip_echo(location, form)
+    body = WHITESPACE.sub(b'', DIGITS.sub(b'', body))
+    return status, location, len(body), hashlib.blake2b(body, digest_size=8).digest()
+
+class Soft404Profile:
+    def __init__(self, fingerprints):
+        self.signatures = {(status, location, body_hash) for status, location, _, body_hash in fingerprints}
+        self.statuses = {(status, location) for status, location, _, _ in fingerprints}
+        # When random paths did not hash alike the miss page is dynamic, so fall
+        # back to matching on a length window around what calibration saw.
+        self.length_windows = {}
+        for status, location, length, _ in fingerprints:
+            same = [fp for fp in fingerprints if fp[:2] == (status, location)]
+            if len({fp[3] for fp in same}) > 1:
+                lengths = [fp[2] for fp in same]
+                slack = max(32, max(lengths) // 50)
+                self.length_windows[(status, location)] = (min(lengths) - slack, max(lengths) + slack)
+
+    def hides_misses_in(self, statuses):
+        return any(status in statuses for status, _ in self.statuses)
+
+    def needs_body(self, status, location):
+        return (status, location) in self.statuses
+
+    def matches(self, fp):
+        status, location, length, body_hash = fp
+        if (status, location, body_hash) in self.signatures:
+            return True
+        window = self.length_windows.get((status, location))
+        return window is not None and window[0] <= length <= window[1]
+
+class Calibrator:
+    # Requests a few random non-existent paths per base URL and suffix the first
+    # time that pair is needed and keeps the resulting Soft404Profile.
+    def __init__(self, engine, headers=None):
+        self.engine = engine
+        self.headers = headers or {}
+        self.profiles = {}
+        self.pending = {}
+
+    async def profile(self, base_url, directory):
+        key = (base_url, suffix_key(directory))
+        profile = self.profiles.get(key)
+        if profile is not None:
+            return profile
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(self.calibrate(base_url, key[1]))
+        profile = await asyncio.shield(self.pending[key])
+        self.profiles[key] = profile
+        return profile
+
+    async def calibrate(self, base_url, suffix):
+        fingerprints = []
+        for probe in range(CALIBRATION_PROBES):
+            # Paths of different lengths, so a miss page whose size depends on
+            # the path does not look constant.
+            word = secrets.token_hex(8 + 4 * probe) + suffix
+            path = urlsplit(join_url(base_url, word)).path
+            try:
+                response = await self.engine.fetch('GET', join_url(base_url, word), self.headers,
+                                                   lambda status, location: True)
+                fingerprints.append(fingerprint(response.status, response.location, response.body, path))
+            except Exception as e:
+                logging.debug(f"Calibration request for {base_url} ({suffix!r}) failed: {str(e)}")
+        logging.debug(f"Calibrated {base_url} ({suffix!r}): {fingerprints}")
+        return Soft404Profile(fingerprints)
@@ -0,0 +1,188 @@
+import argparse
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+from compiledWordlist import normalise_base_url
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY, started REAL, finished REAL, wordlist TEXT, output TEXT);
+CREATE TABLE IF NOT EXISTS run_targets (
+    target TEXT, run INTEGER, PRIMARY KEY (target, run)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS results (
+    target TEXT, path TEXT, run INTEGER, url TEXT, status INTEGER, size INTEGER, fingerprint TEXT,
+    latency_ms REAL, found_at REAL, PRIMARY KEY (target, path, run)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_run ON results (target, run, path);
+CREATE TABLE IF NOT EXISTS scanned_words (
+    target TEXT, word TEXT, PRIMARY KEY (target, word)) WITHOUT ROWID;
+'''
+# Added after the first version of the store; older databases get them on open.
+ADDED_COLUMNS = (('results', 'method', 'TEXT'), ('results', 'location', 'TEXT'),
+                 ('results', 'etag', 'TEXT'), ('results', 'last_modified', 'TEXT'))
+RECORD_COLUMNS = ('url', 'status', 'size', 'method', 'location', 'fingerprint', 'etag', 'last_modified')
+
+def target_for(url, targets):
+    # The longest scanned target the URL lies below; hits under recursion
+    # bases still belong to the target the scan started from.
+    matches = [target for target in targets if url.startswith(target)]
+    if matches:
+        return max(matches, key=len)
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+def url_path(url):
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else '')
+
+class ResultStore:
+    # Hits of every scan, keyed on (target, path, run). A run is one scan,
+    # resumes included; only finished runs are compared, so an interrupted
+    # scan never makes paths look like they disappeared. Every thread gets
+    # its own connection.
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            for table, column, kind in ADDED_COLUMNS:
+                columns = [row[1] for row in connection.execute(f'PRAGMA table_info({table})')]
+                if column not in columns:
+                    connection.execute(f'ALTER TABLE {table} ADD COLUMN {column} {kind}')
+            self.local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def begin_run(self, targets, wordlist, output):
+        with self.connection() as connection:
+            run = connection.execute('INSERT INTO runs (started, wordlist, output) VALUES (?, ?, ?)',
+                                     (time.time(), wordlist, output)).lastrowid
+            connection.executemany('INSERT OR IGNORE INTO run_targets (target, run) VALUES (?, ?)',
+                                   [(target, run) for target in targets])
+        return run
+
+    def finish_run(self, run):
+        with self.connection() as connection:
+            connection.execute('UPDATE runs SET finished = ? WHERE id = ?', (time.time(), run))
+
+    def targets(self, run):
+        rows = self.connection().execute('SELECT target FROM run_targets WHERE run = ?', (run,))
+        return [target for target, in rows]
+
+    def add(self, run, records, targets=None):
+        # One transaction per batch of hit records.
+        targets = targets if targets is not None else self.targets(run)
+        rows = [(target_for(record['url'], targets), url_path(record['url']), run, record.get('latency_ms'),
+                 record.get('time')) + tuple(record.get(column) for column in RECORD_COLUMNS) for record in records]
+        columns = ', '.join(('target', 'path', 'run', 'latency_ms', 'found_at') + RECORD_COLUMNS)
+        with self.connection() as connection:
+            connection.executemany(f'INSERT OR REPLACE INTO results ({columns}) '
+                                   f'VALUES ({", ".join("?" * (5 + len(RECORD_COLUMNS)))})', rows)
+
+    def add_words(self, targets, words):
+        # The words a finished run probed directly below each target, so a
+        # rescan only needs the ones added to the wordlist since.
+        words = list(words)
+        with self.connection() as connection:
+            for target in targets:
+                connection.executemany('INSERT OR IGNORE INTO scanned_words (target, word) VALUES (?, ?)',
+                                       ((target, word) for word in words))
+
+    def scanned_words(self, target):
+        rows = self.connection().execute('SELECT word FROM scanned_words WHERE target = ?', (target,))
+        return {word for word, in rows}
+
+    def last_hits(self, target):
+        # Hit records of the last finished run that scanned the target.
+        runs = self.finished_runs(target, 1)
+        if not runs:
+            return []
+        rows = self.connection().execute(f'SELECT {", ".join(RECORD_COLUMNS)} FROM results '
+                                         f'WHERE target = ? AND run = ? ORDER BY path', (target, runs[0]))
+        return [dict(zip(RECORD_COLUMNS, row)) for row in rows]
+
+    def runs(self, target=None):
+        query = ('SELECT r.id, r.started, r.finished, r.wordlist, '
+                 '(SELECT COUNT(*) FROM results WHERE run = r.id) FROM runs r')
+        if target is None:
+            return self.connection().execute(query + ' ORDER BY r.id').fetchall()
+        return self.connection().execute(query + ' JOIN run_targets t ON t.run = r.id WHERE t.target = ? '
+                                         'ORDER BY r.id', (target,)).fetchall()
+
+    def finished_runs(self, target, count=2):
+        # The last `count` finished runs that scanned the target, newest first.
+        rows = self.connection().execute(
+            'SELECT r.id FROM runs r JOIN run_targets t ON t.run = r.id '
+            'WHERE t.target = ? AND r.finished IS NOT NULL ORDER BY r.id DESC LIMIT ?', (target, count))
+        return [run for run, in rows]
+
+    def difference(self, target, run, other):
+        # Paths found in run but not in other.
+        rows = self.connection().execute(
+            'SELECT r.path, r.status, r.size FROM results r WHERE r.target = ? AND r.run = ? AND NOT EXISTS '
+            '(SELECT 1 FROM results o WHERE o.target = r.target AND o.path = r.path AND o.run = ?) '
+            'ORDER BY r.path', (target, run, other))
+        return rows.fetchall()
+
+    def new_since_last_run(self, target):
+        runs = self.finished_runs(target)
+        if not runs:
+            return []
+        return self.difference(target, runs[0], runs[1] if len(runs) > 1 else None)
+
+    def disappeared(self, target):
+        runs = self.finished_runs(target)
+        if len(runs) < 2:
+            return []
+        return self.difference(target, runs[1], runs[0])
+
+    def hits(self, target, run=None):
+        if run is None:
+            runs = self.finished_runs(target, 1)
+            if not runs:
+                return []
+            run = runs[0]
+        return self.connection().execute('SELECT path, status, size FROM results WHERE target = ? AND run = ? '
+                                         'ORDER BY path', (target, run)).fetchall()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the scan results store")
+    parser.add_argument("--db", default='scan_results.db', help="Results store (default: scan_results.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('runs', help="List runs").add_argument("target", nargs='?')
+    commands.add_parser('new', help="Paths found in the last finished run but not the one before").add_argument("target")
+    commands.add_parser('gone', help="Paths found in the run before the last but not the last").add_argument("target")
+    show = commands.add_parser('show', help="Paths found in a run (default: the last finished one)")
+    show.add_argument("target")
+    show.add_argument("--run", type=int)
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db)
+    target = normalise_base_url(args.target) if args.target else None
+    if args.command == 'runs':
+        for run, started, finished, wordlist, hits in store.runs(target):
+            state = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(finished)) if finished else 'belum selesai'
+            print(f"{run}\t{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))}\t{state}\t{hits} hits\t{wordlist}")
+        return
+    if args.command == 'new':
+        rows = store.new_since_last_run(target)
+    elif args.command == 'gone':
+        rows = store.disappeared(target)
+    else:
+        rows = store.hits(target, args.run)
+    for path, status, size in rows:
+        print(f"{status}\t{size if size is not None else '-'}\t{target.rstrip('/')}{path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+def output_filename(prefix='found_directories'):
+    # One file per run, named after its start time. The file is created here,
+    # exclusively, so runs started within the same second, in one process or
+    # in several, each get their own: -2, -3, ... after the first.
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    for attempt in itertools.count(1):
+        name = f"{prefix}-{stamp}.jsonl" if attempt == 1 else f"{prefix}-{stamp}-{attempt}.jsonl"
+        try:
+            open(name, 'x').close()
+        except FileExistsError:
+            continue
+        except OSError:
+            # Reported when the writer opens it.
+            pass
+        return name
+
+def unresolved_filename(output):
+    # One "<url>\t<reason>" line per path that never got an answer, next to
+    # the hits of the same scan. The prefix keeps it out of the result files
+    # wordRanking.py reads hits from.
+    directory, name = os.path.split(output)
+    return os.path.join(directory, f"unresolved-{os.path.splitext(name)[0]}.txt")
+
+def write_unresolved(path, items):
+    with open(path, 'a', encoding='utf-8') as f:
+        for url, reason in items:
+            f.write(f"{url}\t{reason}\n")
+
+def iter_records(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash.
+                    continue
+    except FileNotFoundError:
+        return
+
+class ResultWriter:
+    # Appends one JSON line per hit from a background thread as hits come in.
+    # Every batch is flushed right away so the file can be tailed, and fsync
+    # runs at most every sync_interval seconds, so a crash loses no more
+    # than that and no hit is kept in memory. With a store, every batch is
+    # also added to it in one transaction under the given run.
+    def __init__(self, path, sync_interval=1.0, store=None, run=None):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.store = store
+        self.run_id = run
+        self.queue = queue.Queue()
+        self.thread = None
+        self.written = 0
+
+    def start(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        self.queue.put(record)
+
+    def sync(self):
+        # Returns once everything written so far is on disk.
+        if self.thread is None:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        targets = self.store.targets(self.run_id) if self.store is not None else None
+        last_sync = time.monotonic()
+        dirty = False
+        stop = False
+        while not stop:
+            try:
+                batch = [self.queue.get(timeout=self.sync_interval)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = []
+            waiting = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiting.append(item)
+                else:
+                    records.append(item)
+            lines = [json.dumps(record, separators=(',', ':')) for record in records]
+            try:
+                if lines:
+                    self.file.write('\n'.join(lines) + '\n')
+                    self.file.flush()
+                    self.written += len(lines)
+                    dirty = True
+                now = time.monotonic()
+                if dirty and (waiting or stop or now - last_sync >= self.sync_interval):
+                    os.fsync(self.file.fileno())
+                    dirty = False
+                    last_sync = now
+            except OSError as e:
+                logging.error(f"Error saving found directories: {str(e)}")
+            if records and self.store is not None:
+                try:
+                    self.store.add(self.run_id, records, targets)
+                except sqlite3.Error as e:
+                    logging.error(f"Error saving to {self.store.path}: {str(e)}")
+            for event in waiting:
+                event.set()
+        self.file.close()
+        if self.store is not None:
+            self.store.close()
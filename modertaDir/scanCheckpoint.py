@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+from scanFrontier import Frontier
+from resultWriter import iter_records
+
+class ChunkTracker:
+    # A job is complete once the feeder has queued all of it (sealed) and every
+    # entry dispatched from it has been probed.
+    def __init__(self, done_buffer):
+        self.done_buffer = done_buffer
+        self.outstanding = {}
+        self.sealed = set()
+
+    def dispatched(self, chunk):
+        self.outstanding[chunk] = self.outstanding.get(chunk, 0) + 1
+
+    def finished(self, chunk):
+        self.outstanding[chunk] -= 1
+        self.maybe_done(chunk)
+
+    def seal(self, chunk):
+        self.sealed.add(chunk)
+        self.maybe_done(chunk)
+
+    def maybe_done(self, chunk):
+        if chunk in self.sealed and not self.outstanding.get(chunk):
+            self.sealed.discard(chunk)
+            self.outstanding.pop(chunk, None)
+            self.done_buffer.add(chunk)
+
+def to_ranges(indices):
+    ranges = []
+    for index in sorted(indices):
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] = index + 1
+        else:
+            ranges.append([index, index + 1])
+    return ranges
+
+def from_ranges(ranges):
+    indices = set()
+    for start, end in ranges:
+        indices.update(range(start, end))
+    return indices
+
+class Checkpoint:
+    # Work is split into jobs, one per (base, chunk): job = base index *
+    # num_chunks + chunk, so jobs of bases found later simply follow on.
+    def __init__(self, path, frontier, wordlist_path, count, chunk_size, output, suffixes=('',), digest=None):
+        self.path = path
+        self.frontier = frontier
+        self.wordlist_path = wordlist_path
+        # Chunk indices are only valid for the exact list they were taken
+        # from, and the same path may hold another order later.
+        self.digest = digest
+        self.count = count
+        self.chunk_size = chunk_size
+        self.suffixes = list(suffixes)
+        self.num_chunks = (count + chunk_size - 1) // chunk_size
+        self.output = output
+        self.completed = set()
+        # Hits live in the output file only. Their URLs are kept per job
+        # until the job is done, and repeats holds hits already written that
+        # a probe may find again: those of chunks still open at an interrupt,
+        # and the seed of a rescan.
+        self.found = 0
+        self.open_hits = {}
+        self.repeats = set()
+        # Row id of the scan in the results store, kept across resumes.
+        self.run = None
+        # Paths no probe got an answer for, counted per reason; the paths
+        # themselves go to the unresolved file next to the output.
+        self.unresolved = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, items):
+        # Returns the bases the hits added to the frontier and the records of
+        # the hits not seen before.
+        added = []
+        hits = []
+        with self.lock:
+            if kind == 'found':
+                # Chunks still open at the interrupt are probed again on resume.
+                for url, parent, job, hit in items:
+                    if url in self.repeats:
+                        self.repeats.discard(url)
+                    else:
+                        self.found += 1
+                        hits.append(hit)
+                    if job is None:
+                        self.repeats.add(url)
+                    else:
+                        self.open_hits.setdefault(job, set()).add(url)
+                    base = self.frontier.expand(url, parent)
+                    if base is not None:
+                        added.append(base)
+            elif kind == 'unresolved':
+                for _, reason in items:
+                    self.unresolved[reason] = self.unresolved.get(reason, 0) + 1
+            elif kind == 'done':
+                self.completed.update(items)
+                for job in items:
+                    self.open_hits.pop(job, None)
+        return added, hits
+
+    def base_count(self, base):
+        # Wordlist entries the base is scanned with.
+        limit = self.frontier.limits[base]
+        return self.count if limit is None else min(limit, self.count)
+
+    def total_jobs(self):
+        return sum((self.base_count(base) + self.chunk_size - 1) // self.chunk_size
+                   for base in range(len(self.frontier)))
+
+    def total_entries(self):
+        return sum(self.base_count(base) for base in range(len(self.frontier))) * len(self.suffixes)
+
+    def job_entries(self, job):
+        base, chunk = divmod(job, self.num_chunks)
+        return min(self.chunk_size, self.base_count(base) - chunk * self.chunk_size) * len(self.suffixes)
+
+    def completed_entries(self):
+        with self.lock:
+            return sum(self.job_entries(job) for job in self.completed)
+
+    def is_complete(self):
+        with self.lock:
+            return len(self.completed) >= self.total_jobs()
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logging.error(f"Checkpoint {path} tidak bisa dibaca: {str(e)}")
+            return None
+        frontier = Frontier.from_state(state['frontier'], state['max_depth'])
+        checkpoint = cls(path, frontier, state['wordlist'], state['count'], state['chunk_size'], state['output'],
+                         state['suffixes'], state.get('digest'))
+        checkpoint.completed = from_ranges(state['completed'])
+        checkpoint.run = state.get('run')
+        checkpoint.unresolved = state.get('unresolved', {})
+        # Hits written after the state was saved may belong to any open chunk.
+        # Checkpoints from before repeats were saved keep every URL.
+        repeats = set(state['repeats']) if 'repeats' in state else None
+        for record in iter_records(checkpoint.output):
+            if repeats is None or checkpoint.found >= state['found'] or record['url'] in repeats:
+                checkpoint.repeats.add(record['url'])
+            checkpoint.found += 1
+        return checkpoint
+
+    def matches(self, wordlist_path, count, chunk_size):
+        return (self.wordlist_path, self.count, self.chunk_size) == (wordlist_path, count, chunk_size)
+
+    def same_wordlist(self, digest):
+        # Checkpoints written before the digest was kept cannot tell.
+        return self.digest is None or self.digest == digest
+
+    def save(self, flush=None):
+        # flush runs between taking the state and writing it, to make what
+        # the state refers to durable first.
+        with self.lock:
+            state = {
+                'wordlist': self.wordlist_path,
+                'digest': self.digest,
+                'count': self.count,
+                'chunk_size': self.chunk_size,
+                'suffixes': self.suffixes,
+                'output': self.output,
+                'max_depth': self.frontier.max_depth,
+                'frontier': self.frontier.to_state(),
+                'completed': to_ranges(self.completed),
+                'found': self.found,
+                'repeats': sorted(self.repeats.union(*self.open_hits.values())),
+                'run': self.run,
+                'unresolved': dict(self.unresolved),
+            }
+        if flush is not None:
+            flush()
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
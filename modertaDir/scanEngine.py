@@ -0,0 +1,495 @@
+import signal
+import argparse
+from urllib.parse import urlsplit
+import sys
+import logging
+import multiprocessing
+import threading
+import sqlite3
+import time
+import importlib.util
+from compiledWordlist import CHUNK_SIZE, CompiledWordlist, ensure_compiled, parse_suffixes, wordlist_digest
+from scanCheckpoint import Checkpoint
+from scanFrontier import Frontier, JobDispatcher
+from responseFingerprint import MAX_BODY
+from scanStats import ScanStats
+from scanProgress import ProgressReporter
+from dnsCache import DnsCache, refresh_dns
+from resultWriter import ResultWriter, output_filename, unresolved_filename, write_unresolved
+from resultStore import ResultStore
+from wordRanking import ensure_ranked
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BROWSER_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:89.0) Gecko/20100101 Firefox/89.0'
+]
+
+class ScanConfig:
+    def __init__(self, wordlist, max_concurrent=100, timeout=5, num_processes=None,
+                 min_concurrent=1, initial_concurrent=10, per_host_concurrent=None, found_status=(200,),
+                 allow_redirects=True, headers=None, user_agents=None, calibrate=True, head_first=True, max_body=MAX_BODY,
+                 checkpoint='scan_checkpoint.json', checkpoint_interval=10, max_depth=0, extensions=None,
+                 engine='aiohttp', pipeline=4, event_loop='auto', stats_file=None, stats_interval=10,
+                 output=None, store='scan_results.db', ranking='wordlist_stats.json', dns_refresh=300,
+                 retries=2, retry_delay=1.0, retry_budget=10, log_errors=False):
+        self.wordlist = wordlist
+        # max_concurrent caps the requests in flight per process across all
+        # hosts. Each host gets its own AdaptiveLimiter, tuned between
+        # min_concurrent and max_concurrent, or per_host_concurrent split
+        # over the processes when a total per host is given.
+        self.max_concurrent = max_concurrent
+        self.min_concurrent = min_concurrent
+        self.initial_concurrent = initial_concurrent
+        self.per_host_concurrent = per_host_concurrent
+        self.timeout = timeout
+        self.num_processes = num_processes or multiprocessing.cpu_count()
+        self.found_status = tuple(found_status)
+        self.allow_redirects = allow_redirects
+        self.headers = headers or {}
+        # None, a list of user agent strings, or 'fake' for fake_useragent
+        self.user_agents = user_agents
+        # Classify found_status responses against soft-404 fingerprints of
+        # random paths instead of accepting every one of them.
+        self.calibrate = calibrate
+        # Probe with HEAD (falling back to GET on 405/501) and read at most
+        # max_body bytes of a body, only when classification needs it.
+        self.head_first = head_first
+        self.max_body = max_body
+        # Completed ranges and hits are written here every checkpoint_interval
+        # seconds so an interrupted scan can continue with --resume.
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        # Hits that look like directories are scanned again with the whole
+        # wordlist, up to max_depth levels below the base URL.
+        self.max_depth = max_depth
+        # Suffixes such as '.php,.bak,/' are appended to every word as it is
+        # dispatched; the wordlist itself stays one copy of the bare words.
+        self.suffixes = parse_suffixes(extensions)
+        # 'raw' probes with the pipelining HTTP/1.1 client in rawHttp.py, up to
+        # pipeline requests per connection, with aiohttp as its fallback.
+        self.engine = engine
+        self.pipeline = pipeline
+        # 'auto' runs the workers on uvloop when it is installed, 'uvloop' or
+        # 'asyncio' ask for one of them.
+        self.event_loop = event_loop
+        # Request rate, per-phase latency, status codes, errors, bytes, CPU and
+        # RSS are written here every stats_interval seconds and when the scan
+        # ends, as Prometheus text for a *.prom file and as JSON otherwise.
+        self.stats_file = stats_file
+        self.stats_interval = stats_interval
+        # Hits are appended here as JSON lines while scanning; by default a
+        # new found_directories-<start time>.jsonl per scan.
+        self.output = output
+        # Every scan also adds its hits to this SQLite store, which answers
+        # what is new or gone per target across runs (see resultStore.py).
+        self.store = store
+        # Hit counts per word over the past found_directories* files, updated
+        # before every scan; words that were hits before are dispatched first
+        # (see wordRanking.py). None scans in wordlist order.
+        self.ranking = ranking
+        # Target hosts are resolved once in the parent and the addresses
+        # shared with the workers, refreshed every dns_refresh seconds in the
+        # background. 0 lets every worker resolve on its own.
+        self.dns_refresh = dns_refresh
+        # Entries whose probe timed out, lost its connection or got a 429/503
+        # are tried again up to retries times, after retry_delay seconds
+        # doubling per attempt. Retries are held to retry_budget percent of
+        # the entries probed; what stays unanswered is listed at the end.
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.retry_budget = retry_budget
+        self.log_errors = log_errors
+
+def collect_results(result_queue, checkpoint, dispatcher, total_directories, stats, writer):
+    # New bases are handed to the dispatcher as soon as they are found. Once
+    # every published job is done nothing can add to the frontier, so it is closed.
+    dispatcher.notify(closed=not checkpoint.frontier.can_grow() or checkpoint.is_complete())
+    for kind, batch in iter(result_queue.get, None):
+        if kind == 'stats':
+            stats.merge(batch)
+            continue
+        added, hits = checkpoint.record(kind, batch)
+        if kind == 'unresolved':
+            try:
+                write_unresolved(unresolved_filename(checkpoint.output), batch)
+            except OSError as e:
+                logging.error(f"Error saving unresolved paths: {str(e)}")
+            continue
+        for hit in hits:
+            writer.write(hit)
+            logging.info(f"[+] Directory found: {hit['url']}")
+        for base in added:
+            logging.info(f"[>] Scanning below {base}")
+        total_directories.value = checkpoint.total_entries()
+        if added or (kind == 'done' and checkpoint.is_complete()):
+            dispatcher.notify(closed=not added and checkpoint.is_complete())
+
+def report_unresolved(checkpoint):
+    if not checkpoint.unresolved:
+        return
+    reasons = sorted(checkpoint.unresolved.items(), key=lambda item: -item[1])
+    logging.warning(f"Path tanpa jawaban: {sum(checkpoint.unresolved.values())} "
+                    f"({', '.join(f'{count} {reason}' for reason, count in reasons)}), "
+                    f"daftarnya di '{unresolved_filename(checkpoint.output)}'.")
+
+def wait_for_workers(processes, dispatcher, interval=0.5):
+    # A worker that dies takes the jobs it held with it, and they would never
+    # be reported done. Nothing more is dispatched then: the other workers
+    # finish what they have and the scan ends with those jobs open in the
+    # checkpoint, for --resume.
+    # Checked before returning too, for when the dead worker was the last one.
+    stopped = False
+    while True:
+        if not stopped and any(p.exitcode for p in processes):
+            stopped = True
+            for p in processes:
+                if p.exitcode:
+                    logging.error(f"Worker {p.pid} berhenti dengan exit code {p.exitcode}, scan dihentikan.")
+            dispatcher.stop()
+        running = [p for p in processes if p.exitcode is None]
+        if not running:
+            return
+        running[0].join(interval)
+
+def write_stats(stats, path, interval, started, scanned_counts, stop):
+    while not stop.wait(interval):
+        try:
+            stats.write(path, time.monotonic() - started, sum(scanned_counts))
+        except OSError as e:
+            logging.error(f"Error saving stats: {str(e)}")
+
+def write_checkpoints(checkpoint, interval, stop, writer):
+    # Hits of the chunks a checkpoint marks done must be on disk before it is.
+    while not stop.wait(interval):
+        try:
+            checkpoint.save(writer.sync)
+        except OSError as e:
+            logging.error(f"Error saving checkpoint: {str(e)}")
+
+EVENT_LOOPS = ('asyncio', 'uvloop')
+
+def resolve_event_loop(name):
+    # The loop the workers will actually run on.
+    if name == 'asyncio' or sys.platform.startswith('win'):
+        return 'asyncio'
+    # Only probe for uvloop here, the workers import it themselves.
+    if importlib.util.find_spec('uvloop') is None:
+        if name == 'uvloop':
+            logging.warning("uvloop tidak terpasang, memakai event loop asyncio.")
+        return 'asyncio'
+    return 'uvloop'
+
+def load_checkpoint(config, targets, wordlist_path, total_directories, digest):
+    checkpoint = Checkpoint.load(config.checkpoint)
+    if checkpoint is None:
+        logging.info(f"Checkpoint {config.checkpoint} tidak ditemukan, scan dimulai dari awal.")
+        return None
+    if not checkpoint.matches(wordlist_path, total_directories, CHUNK_SIZE) or \
+            (targets and set(Frontier(targets).targets()) != set(checkpoint.frontier.targets())):
+        logging.warning(f"Checkpoint {config.checkpoint} dibuat untuk scan lain.")
+        return None
+    if not checkpoint.same_wordlist(digest):
+        logging.warning(f"Isi {wordlist_path} berubah sejak checkpoint {config.checkpoint} dibuat (di-rank ulang?).")
+        return None
+    logging.info(f"Resuming {', '.join(checkpoint.frontier.targets())}: "
+                 f"{checkpoint.completed_entries()}/{checkpoint.total_entries()} "
+                 f"directories already scanned, {checkpoint.found} found, {len(checkpoint.frontier)} bases.")
+    return checkpoint
+
+def claim_checkpoint(path, targets):
+    # A new scan takes the checkpoint file over, but not from an unfinished
+    # scan of other targets; that one stays there for --resume.
+    existing = Checkpoint.load(path)
+    if existing is None:
+        return True
+    previous = existing.frontier.targets()
+    if set(previous) != set(Frontier(targets).targets()):
+        logging.error(f"Checkpoint {path} menyimpan scan yang belum selesai untuk {', '.join(previous)}. "
+                      f"Lanjutkan dengan --resume atau pakai file lain dengan --checkpoint.")
+        return False
+    logging.warning(f"Checkpoint {path} untuk target yang sama ditimpa, scan dimulai dari awal.")
+    return True
+
+def run_scan(targets, config, resume=False, seed=None, limit=None):
+    # targets is one base URL or a list of them; None continues the checkpoint.
+    # seed holds hit records carried over from an earlier run, written out and
+    # expanded before the scan starts. With limit, the targets and the bases
+    # the seed expands to are scanned with only the first limit entries of the
+    # wordlist; bases found while scanning always get all of it. Returns the
+    # path of the results file, None when nothing was scanned.
+    if isinstance(targets, str):
+        targets = [targets]
+    try:
+        wordlist_path = ensure_compiled(config.wordlist)
+    except FileNotFoundError:
+        logging.error(f"File {config.wordlist} tidak ditemukan.")
+        return None
+    if config.ranking:
+        wordlist_path = ensure_ranked(wordlist_path, config.ranking, refresh=not resume)
+    wordlist = CompiledWordlist(wordlist_path)
+    total_directories = len(wordlist)
+    wordlist.close()
+    if not total_directories and not seed:
+        logging.error("Tidak ada direktori untuk di-scan.")
+        return None
+
+    digest = wordlist_digest(wordlist_path)
+    checkpoint = load_checkpoint(config, targets, wordlist_path, total_directories, digest) if resume else None
+    if checkpoint is None:
+        if not targets:
+            logging.error("URL tidak diberikan.")
+            return None
+        if config.checkpoint and not claim_checkpoint(config.checkpoint, targets):
+            return None
+        checkpoint = Checkpoint(config.checkpoint, Frontier(targets, config.max_depth, limit), wordlist_path,
+                                total_directories, CHUNK_SIZE, config.output or output_filename(),
+                                config.suffixes, digest)
+    # A resumed scan keeps the suffixes it was started with.
+    config.suffixes = checkpoint.suffixes
+    config.event_loop = resolve_event_loop(config.event_loop)
+    logging.info(f"Event loop: {config.event_loop}, engine: {config.engine}")
+    already_scanned = checkpoint.completed_entries()
+
+    result_queue = multiprocessing.Queue()
+    interrupt_event = multiprocessing.Event()
+
+    def signal_handler(signum, frame):
+        logging.info("\nInterrupt received, stopping processes...")
+        interrupt_event.set()
+
+    # Put back once the scan is over, for callers that go on running.
+    previous_handler = signal.signal(signal.SIGINT, signal_handler)
+
+    num_processes = min(config.num_processes, total_directories)
+    scanned_counts = multiprocessing.Array('Q', num_processes, lock=False)
+    error_counts = multiprocessing.Array('Q', num_processes, lock=False)
+    total_entries = multiprocessing.Value('Q', checkpoint.total_entries(), lock=False)
+    job_queue = multiprocessing.Queue(maxsize=num_processes * 2)
+
+    stats = ScanStats()
+    store = ResultStore(config.store) if config.store else None
+    try:
+        if store is not None and checkpoint.run is None:
+            checkpoint.run = store.begin_run(checkpoint.frontier.targets(), config.wordlist, checkpoint.output)
+    except sqlite3.Error as e:
+        logging.error(f"Error opening {config.store}: {str(e)}")
+        store = None
+    writer = ResultWriter(checkpoint.output, store=store, run=checkpoint.run)
+    try:
+        writer.start()
+    except OSError as e:
+        logging.error(f"Error saving found directories: {str(e)}")
+        signal.signal(signal.SIGINT, previous_handler)
+        return None
+    logging.info(f"Found directories are written to '{checkpoint.output}'.")
+    if seed:
+        # Shallow paths first, so deeper ones expand below them.
+        seed = sorted(seed, key=lambda record: len(record['url']))
+        for record in seed:
+            added, hits = checkpoint.record('found', [(record['url'], checkpoint.frontier.parent_of(record['url']),
+                                                        None, record)])
+            for hit in hits:
+                writer.write(hit)
+    checkpoint.frontier.limit = None
+    total_entries.value = checkpoint.total_entries()
+    started = time.monotonic()
+
+    dns = None
+    hosts = {urlsplit(target).hostname for target in checkpoint.frontier.targets()} - {None}
+    if config.dns_refresh and hosts:
+        dns = DnsCache()
+        dns.resolve(hosts)
+
+    # Imported here so starting a preset or the menu does not pay for it.
+    from scanWorker import worker
+    processes = []
+    for i in range(num_processes):
+        p = multiprocessing.Process(target=worker, args=(i, job_queue, wordlist_path, config, result_queue,
+                                                         scanned_counts, error_counts, interrupt_event, dns))
+        processes.append(p)
+        p.start()
+    # Started after the workers are forked, as it takes over the log stream.
+    progress = ProgressReporter(lambda: (already_scanned + sum(scanned_counts), total_entries.value,
+                                         checkpoint.found, sum(error_counts)))
+    progress.start()
+
+    dispatcher = JobDispatcher(checkpoint, job_queue, num_processes, interrupt_event)
+    threading.Thread(target=dispatcher.run, daemon=True).start()
+    collector = threading.Thread(target=collect_results,
+                                 args=(result_queue, checkpoint, dispatcher, total_entries, stats, writer),
+                                 daemon=True)
+    collector.start()
+    stop_checkpoints = threading.Event()
+    checkpoint_writer = None
+    if config.checkpoint:
+        checkpoint_writer = threading.Thread(target=write_checkpoints,
+                                             args=(checkpoint, config.checkpoint_interval, stop_checkpoints, writer),
+                                             daemon=True)
+        checkpoint_writer.start()
+    if dns is not None:
+        threading.Thread(target=refresh_dns, args=(dns, hosts, config.dns_refresh, stop_checkpoints),
+                         daemon=True).start()
+    if config.stats_file and config.stats_interval:
+        threading.Thread(target=write_stats, args=(stats, config.stats_file, config.stats_interval, started,
+                                                   scanned_counts, stop_checkpoints), daemon=True).start()
+
+    try:
+        wait_for_workers(processes, dispatcher)
+    except KeyboardInterrupt:
+        logging.info("Main process interrupted")
+    finally:
+        interrupt_event.set()
+        for p in processes:
+            p.join()
+        result_queue.put(None)
+        collector.join()
+        progress.stop()
+        stop_checkpoints.set()
+        # A save still in progress would otherwise land over the final one,
+        # or bring back the checkpoint removed below.
+        if checkpoint_writer is not None:
+            checkpoint_writer.join()
+        writer.close()
+
+        logging.info(f"\nTotal direktori ditemukan: {checkpoint.found}")
+        logging.info(f"Total direktori di-scan: {already_scanned + sum(scanned_counts)}/{total_entries.value}")
+        logging.info(f"Found directories saved to '{checkpoint.output}'.")
+        report_unresolved(checkpoint)
+        if config.stats_file:
+            stats.add_own_usage()
+            try:
+                stats.write(config.stats_file, time.monotonic() - started, sum(scanned_counts))
+            except OSError as e:
+                logging.error(f"Error saving stats: {str(e)}")
+        if store is not None:
+            try:
+                if checkpoint.is_complete():
+                    wordlist = CompiledWordlist(wordlist_path)
+                    store.add_words(checkpoint.frontier.targets(), wordlist.iter_range(0, len(wordlist)))
+                    wordlist.close()
+                    store.finish_run(checkpoint.run)
+            except sqlite3.Error as e:
+                logging.error(f"Error saving to {config.store}: {str(e)}")
+            store.close()
+        if config.checkpoint:
+            if checkpoint.is_complete():
+                checkpoint.remove()
+            else:
+                checkpoint.save()
+                logging.info(f"Checkpoint saved to '{config.checkpoint}', continue with --resume.")
+        signal.signal(signal.SIGINT, previous_handler)
+    return checkpoint.output
+
+def compare_event_loops(targets, config):
+    # Runs the same targets and wordlist once per available loop, without
+    # recursion or checkpoint, and reports the rate each one reached.
+    loops = [name for name in EVENT_LOOPS if resolve_event_loop(name) == name]
+    wordlist = CompiledWordlist(ensure_compiled(config.wordlist))
+    entries = len(targets) * len(wordlist) * len(config.suffixes)
+    wordlist.close()
+    config.max_depth = 0
+    config.checkpoint = None
+    config.store = None
+    rates = {}
+    for name in loops:
+        config.event_loop = name
+        started = time.monotonic()
+        run_scan(targets, config)
+        elapsed = time.monotonic() - started
+        rates[name] = entries / elapsed
+    for name, rate in rates.items():
+        logging.info(f"{name}: {entries} entries, {rate:.0f} req/s")
+    return rates
+
+def read_targets(filename):
+    with open(filename) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def run_preset(config, argv=None):
+    parser = argparse.ArgumentParser(description="Web Directory Scanner")
+    parser.add_argument("url", nargs='*', help="Base URL(s) to scan (asked interactively when omitted)")
+    parser.add_argument("--targets", help="File with one base URL per line, scanned together")
+    parser.add_argument("--resume", action='store_true', help="Continue the scan saved in the checkpoint file")
+    parser.add_argument("--checkpoint", default=config.checkpoint,
+                        help=f"File the scan state is saved to and resumed from (default: {config.checkpoint})")
+    parser.add_argument("--depth", type=int, default=config.max_depth,
+                        help=f"Scan found directories recursively, up to this many levels (default: {config.max_depth})")
+    parser.add_argument("-c", "--concurrent", type=int, default=config.max_concurrent,
+                        help=f"Max concurrent requests per process (default: {config.max_concurrent})")
+    parser.add_argument("--per-host", type=int, default=config.per_host_concurrent,
+                        help="Max concurrent requests per host, over all processes")
+    parser.add_argument("-e", "--extensions", help="Suffixes tried after every word, e.g. .php,.bak,/")
+    parser.add_argument("--engine", choices=('aiohttp', 'raw'), default=config.engine,
+                        help=f"HTTP client used for probing (default: {config.engine})")
+    parser.add_argument("--pipeline", type=int, default=config.pipeline,
+                        help=f"Requests pipelined per connection by the raw engine (default: {config.pipeline})")
+    parser.add_argument("--loop", choices=('auto',) + EVENT_LOOPS, default=config.event_loop,
+                        help=f"Event loop for the workers (default: {config.event_loop})")
+    # A preset without a wordlist of its own needs one on the command line.
+    parser.add_argument("-w", "--wordlist", default=config.wordlist, required=config.wordlist is None,
+                        help=f"Wordlist to scan with (default: {config.wordlist})" if config.wordlist
+                        else "Wordlist to scan with")
+    parser.add_argument("--stats", default=config.stats_file,
+                        help="Write request rate, per-phase latency, statuses, errors and bytes to this file "
+                             "while scanning (Prometheus text for *.prom, JSON otherwise)")
+    parser.add_argument("-o", "--output", default=config.output,
+                        help="JSON lines file the hits are appended to (default: found_directories-<time>.jsonl)")
+    parser.add_argument("--store", default=config.store,
+                        help=f"SQLite store every run adds its hits to, query it with resultStore.py "
+                             f"(default: {config.store})")
+    parser.add_argument("--no-store", dest='store', action='store_const', const=None,
+                        help="Do not add the hits to the results store")
+    parser.add_argument("--dns-refresh", type=int, default=config.dns_refresh,
+                        help=f"Resolve the targets once and share the addresses with the workers, refreshed "
+                             f"every this many seconds; 0 to resolve in every worker (default: {config.dns_refresh})")
+    parser.add_argument("--retries", type=int, default=config.retries,
+                        help=f"Times an entry is tried again after a timeout, connection error or 429/503 "
+                             f"(default: {config.retries})")
+    parser.add_argument("--retry-budget", type=float, default=config.retry_budget,
+                        help=f"Retries allowed, as a percentage of the entries probed (default: {config.retry_budget})")
+    parser.add_argument("--no-ranking", dest='ranking', action='store_const', const=None, default=config.ranking,
+                        help="Scan in wordlist order instead of past hits first")
+    parser.add_argument("--rescan", action='store_true',
+                        help="Revalidate the hits of the last run with conditional requests and scan only the "
+                             "words added to the wordlist since")
+    parser.add_argument("--sample", type=float, default=0.0,
+                        help="With --rescan, also scan this fraction of the words scanned before, e.g. 0.05")
+    parser.add_argument("--compare-loops", action='store_true',
+                        help="Scan the targets once on every available event loop and report req/s")
+    args = parser.parse_args(argv)
+    config.checkpoint = args.checkpoint
+    config.max_depth = args.depth
+    config.max_concurrent = args.concurrent
+    config.per_host_concurrent = args.per_host
+    config.engine = args.engine
+    config.pipeline = args.pipeline
+    config.event_loop = args.loop
+    config.wordlist = args.wordlist
+    config.stats_file = args.stats
+    config.output = args.output
+    config.store = args.store
+    config.ranking = args.ranking
+    config.dns_refresh = args.dns_refresh
+    config.retries = args.retries
+    config.retry_budget = args.retry_budget
+    if args.extensions:
+        config.suffixes = parse_suffixes(args.extensions)
+
+    targets = list(args.url)
+    if args.targets:
+        try:
+            targets += read_targets(args.targets)
+        except FileNotFoundError:
+            logging.error(f"File {args.targets} tidak ditemukan.")
+            return None
+    if not targets and not args.resume:
+        targets = [input("Masukkan URL website yang ingin di-scan: ")]
+    if args.compare_loops:
+        return compare_event_loops(targets, config)
+    if args.rescan:
+        from rescan import run_rescan
+        return run_rescan(targets, config, args.sample, args.resume)
+    return run_scan(targets, config, args.resume)
@@ -0,0 +1,170 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+from compiledWordlist import normalise_base_url
+from responseFingerprint import suffix_key
+
+def looks_like_directory(url):
+    # Only hits without a file extension are worth scanning below.
+    return suffix_key(url) in ('', '/')
+
+class Frontier:
+    # Base URLs to scan, in the order they were discovered, starting with the
+    # targets at depth 0. Each base is scanned with the wordlist once, so
+    # (base, word) pairs never repeat: with the whole of it, or only with its
+    # first limit entries when the base was added while limit was set.
+    def __init__(self, targets=(), max_depth=0, limit=None):
+        self.max_depth = max_depth
+        self.bases = []
+        self.depths = []
+        self.limits = []
+        self.seen = set()
+        self.limit = limit
+        for target in targets:
+            self.add(target, 0)
+
+    def __len__(self):
+        return len(self.bases)
+
+    def targets(self):
+        return [base for base, depth in zip(self.bases, self.depths) if depth == 0]
+
+    def add(self, url, depth):
+        base = normalise_base_url(url)
+        if depth > self.max_depth or base in self.seen:
+            return None
+        self.seen.add(base)
+        self.bases.append(base)
+        self.depths.append(depth)
+        self.limits.append(self.limit)
+        return base
+
+    def expand(self, url, parent):
+        # parent is the index of the base the hit was found under.
+        if not looks_like_directory(url):
+            return None
+        return self.add(url, self.depths[parent] + 1)
+
+    def parent_of(self, url):
+        # Index of the deepest base the URL lies below, for hits carried over
+        # from an earlier run.
+        url = normalise_base_url(url)
+        below = [index for index, base in enumerate(self.bases) if url.startswith(base) and url != base]
+        return max(below, key=lambda index: len(self.bases[index]))
+
+    def can_grow(self):
+        return self.max_depth > 0
+
+    def to_state(self):
+        return [[base, depth, limit] for base, depth, limit in zip(self.bases, self.depths, self.limits)]
+
+    @classmethod
+    def from_state(cls, state, max_depth):
+        frontier = cls(max_depth=max_depth)
+        for base, depth, *limit in state:
+            frontier.limit = limit[0] if limit else None
+            frontier.add(base, depth)
+        frontier.limit = None
+        return frontier
+
+class JobDispatcher:
+    # Runs in the parent and hands jobs to the workers round-robin across
+    # hosts, so every host has work in flight at once instead of one target
+    # after another. Jobs completed in an earlier run are left out.
+    def __init__(self, checkpoint, job_queue, num_workers, interrupt_event):
+        self.checkpoint = checkpoint
+        self.job_queue = job_queue
+        self.num_workers = num_workers
+        self.interrupt_event = interrupt_event
+        self.skip = set(checkpoint.completed)
+        self.hosts = OrderedDict()
+        self.known = 0
+        self.closed = False
+        self.stopped = False
+        self.changed = threading.Condition()
+
+    def notify(self, closed=False):
+        with self.changed:
+            self.closed = self.closed or closed
+            self.changed.notify()
+
+    def stop(self):
+        # No further jobs; the workers get their end marker right away.
+        with self.changed:
+            self.stopped = True
+            self.changed.notify()
+
+    def take_new_bases(self):
+        with self.checkpoint.lock:
+            bases = self.checkpoint.frontier.bases[self.known:]
+            counts = [self.checkpoint.base_count(base) for base in range(self.known, self.known + len(bases))]
+        for base_url, count in zip(bases, counts):
+            if count:
+                self.hosts.setdefault(urlsplit(base_url).netloc, deque()).append([self.known, base_url, 0, count])
+            self.known += 1
+
+    def next_job(self):
+        # (job, base_url, count): count is the number of wordlist entries the
+        # base is scanned with, which ends its last chunk early.
+        checkpoint = self.checkpoint
+        self.take_new_bases()
+        while self.hosts:
+            host, bases = next(iter(self.hosts.items()))
+            self.hosts.move_to_end(host)
+            entry = bases[0]
+            base, base_url, chunk, count = entry
+            entry[2] += 1
+            if entry[2] * checkpoint.chunk_size >= count:
+                bases.popleft()
+                if not bases:
+                    del self.hosts[host]
+            job = base * checkpoint.num_chunks + chunk
+            if job not in self.skip:
+                return job, base_url, count
+        return None
+
+    def put(self, item):
+        while not self.interrupt_event.is_set():
+            try:
+                self.job_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(self):
+        while not self.interrupt_event.is_set():
+            with self.changed:
+                if self.stopped:
+                    break
+                job = self.next_job()
+                if job is None:
+                    if self.closed:
+                        break
+                    self.changed.wait(0.5)
+                    continue
+            if not self.put(job):
+                return
+        for _ in range(self.num_workers):
+            if not self.put(None):
+                return
+
+class JobFeed:
+    # Worker-side end of the job queue: (job, base_url, count), or None when the
+    # frontier is exhausted or the parent has gone away.
+    def __init__(self, job_queue, poll_interval=0.5):
+        self.job_queue = job_queue
+        self.poll_interval = poll_interval
+
+    async def get(self):
+        loop = asyncio.get_running_loop()
+        parent = multiprocessing.parent_process()
+        while True:
+            try:
+                return await loop.run_in_executor(None, self.job_queue.get, True, self.poll_interval)
+            except queue.Empty:
+                if parent is not None and not parent.is_alive():
+                    return None
@@ -0,0 +1,113 @@
+import logging
+import math
+import sys
+import threading
+import time
+
+def format_duration(seconds):
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+class StatusStream:
+    # Stands in for the terminal under logging's handlers: the status line is
+    # cleared before a log line is written and drawn again after it, so the
+    # two never end up on the same line.
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.line = ''
+
+    def write(self, text):
+        with self.lock:
+            if self.line:
+                self.stream.write('\r\x1b[K')
+            self.stream.write(text)
+            if self.line and text.endswith('\n'):
+                self.stream.write(self.line)
+            self.stream.flush()
+
+    def flush(self):
+        self.stream.flush()
+
+    def show(self, line):
+        with self.lock:
+            self.line = line
+            self.stream.write('\r' + line + '\x1b[K')
+            self.stream.flush()
+
+    def finish(self):
+        with self.lock:
+            if self.line:
+                self.stream.write('\n')
+                self.stream.flush()
+            self.line = ''
+
+class ProgressReporter:
+    # The one place scan progress is shown. A thread in the parent samples the
+    # counters the workers publish in shared memory every interval seconds;
+    # the workers themselves never touch the terminal. On a terminal it keeps
+    # a single status line up to date, otherwise it logs a line every
+    # log_interval seconds. sample() returns (done, total, found, errors).
+    def __init__(self, sample, interval=0.5, half_life=5.0, log_interval=10.0, stream=None):
+        self.sample = sample
+        self.interval = interval
+        self.half_life = half_life
+        self.log_interval = log_interval
+        self.stream = stream or sys.stderr
+        self.status = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.rate = None
+
+    def start(self):
+        if self.stream.isatty():
+            self.status = StatusStream(self.stream)
+            for handler in logging.getLogger().handlers:
+                if isinstance(handler, logging.StreamHandler) and handler.stream is self.stream:
+                    handler.setStream(self.status)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        if self.status is not None:
+            self.status.finish()
+            for handler in logging.getLogger().handlers:
+                if isinstance(handler, logging.StreamHandler) and handler.stream is self.status:
+                    handler.setStream(self.stream)
+            self.status = None
+
+    def run(self):
+        first_done, _, _, first_errors = self.sample()
+        last_done = first_done
+        last_time = time.monotonic()
+        last_log = last_time
+        while not self.stop_event.wait(self.interval):
+            done, total, found, errors = self.sample()
+            now = time.monotonic()
+            elapsed = now - last_time
+            # Exponentially weighted req/s, decaying by half every half_life.
+            current = (done - last_done) / elapsed if elapsed > 0 else 0.0
+            weight = 1 - math.exp(-elapsed * math.log(2) / self.half_life)
+            self.rate = current if self.rate is None else self.rate + weight * (current - self.rate)
+            last_done, last_time = done, now
+            line = self.line(done, total, found, errors - first_errors, done - first_done)
+            if self.status is not None:
+                self.status.show(line)
+            elif now - last_log >= self.log_interval:
+                logging.info(f"Progress: {line}")
+                last_log = now
+
+    def line(self, done, total, found, errors, requests):
+        percentage = done * 100 / total if total else 0
+        error_rate = errors * 100 / requests if requests else 0
+        eta = (total - done) / self.rate if self.rate else None
+        return (f"{done}/{total} ({percentage:.1f}%) | {self.rate or 0:.0f} req/s | {found} found | "
+                f"{error_rate:.1f}% errors | ETA {format_duration(eta)}")
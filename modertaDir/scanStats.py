@@ -0,0 +1,202 @@
+import json
+import math
+import os
+import threading
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; CPU and RSS are then left out.
+    resource = None
+
+BUCKETS_PER_DECADE = 10
+SMALLEST_LATENCY = 1e-4
+# dns and connect come from aiohttp's trace hooks (or the raw engine's own
+# connect, TLS included), ttfb runs from sending the request to its response
+# head, body from there until the response is released, total per request.
+PHASES = ('dns', 'connect', 'ttfb', 'body', 'total')
+
+def process_usage():
+    # (cpu seconds, peak RSS in KB) of the calling process.
+    if resource is None:
+        return 0.0, 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss
+
+def bucket_edge(bucket):
+    return SMALLEST_LATENCY * 10 ** ((bucket + 1) / BUCKETS_PER_DECADE)
+
+def count_into(counts, key, count=1):
+    counts[key] = counts.get(key, 0) + count
+
+class LatencyHistogram:
+    # Log-scale buckets, ten per decade from 0.1 ms, so every request can be
+    # recorded for the cost of a dict update and the histograms of all
+    # workers simply add up.
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, seconds):
+        bucket = int(math.log10(max(seconds, SMALLEST_LATENCY) / SMALLEST_LATENCY) * BUCKETS_PER_DECADE)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.sum += seconds
+
+    def to_state(self):
+        return {'counts': self.counts, 'sum': self.sum}
+
+    def merge(self, state):
+        for bucket, count in state['counts'].items():
+            count_into(self.counts, int(bucket), count)
+            self.total += count
+        self.sum += state['sum']
+
+    def percentile(self, fraction):
+        # Upper edge of the bucket holding that fraction of the requests.
+        if not self.total:
+            return None
+        rank = fraction * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return bucket_edge(bucket)
+        return None
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+class ScanStats:
+    # Per-phase latency, status codes, error classes and bytes. Workers ship
+    # what they gathered since the last flush to the parent, which merges
+    # the deltas; CPU and peak RSS are kept per process and summed.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.reset()
+        self.usage = {}
+
+    def reset(self):
+        self.requests = 0
+        self.retries = 0
+        self.phases = {phase: LatencyHistogram() for phase in PHASES}
+        self.statuses = {}
+        self.errors = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def observe(self, seconds):
+        self.requests += 1
+        self.phases['total'].add(seconds)
+
+    def phase(self, name, seconds):
+        self.phases[name].add(seconds)
+
+    def status(self, status):
+        count_into(self.statuses, status)
+
+    def error(self, exc):
+        count_into(self.errors, type(exc).__name__)
+
+    def retry(self):
+        self.retries += 1
+
+    def transferred(self, sent, received):
+        self.bytes_out += sent
+        self.bytes_in += received
+
+    def drain(self):
+        # Everything since the last drain, plus this process's usage so far.
+        state = {'pid': os.getpid(), 'usage': process_usage(), 'requests': self.requests,
+                 'retries': self.retries, 'phases': {name: histogram.to_state() for name, histogram in self.phases.items() if histogram.total},
+                 'statuses': self.statuses, 'errors': self.errors,
+                 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out}
+        self.reset()
+        return state
+
+    def merge(self, state):
+        with self.lock:
+            self.usage[state['pid']] = state['usage']
+            self.requests += state['requests']
+            self.retries += state['retries']
+            for name, histogram in state['phases'].items():
+                self.phases[name].merge(histogram)
+            for status, count in state['statuses'].items():
+                count_into(self.statuses, status, count)
+            for error, count in state['errors'].items():
+                count_into(self.errors, error, count)
+            self.bytes_in += state['bytes_in']
+            self.bytes_out += state['bytes_out']
+
+    def add_own_usage(self):
+        with self.lock:
+            self.usage[os.getpid()] = process_usage()
+
+    def summary(self, elapsed, entries):
+        with self.lock:
+            total = self.phases['total']
+            cpu_seconds = sum(cpu for cpu, _ in self.usage.values())
+            return {
+                'entries': entries,
+                'requests': self.requests,
+                'retries': self.retries,
+                'elapsed': round(elapsed, 3),
+                'requests_per_second': round(self.requests / elapsed, 1) if elapsed > 0 else None,
+                'latency_p50_ms': milliseconds(total.percentile(0.5)),
+                'latency_p99_ms': milliseconds(total.percentile(0.99)),
+                # Summed over the parent and the workers.
+                'peak_rss_kb': sum(rss for _, rss in self.usage.values()),
+                'cpu_seconds': round(cpu_seconds, 3),
+                'cpu_ms_per_request': round(cpu_seconds * 1000 / self.requests, 4) if self.requests else None,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+                'errors': dict(sorted(self.errors.items())),
+                'phases': {name: {'count': histogram.total,
+                                  'p50_ms': milliseconds(histogram.percentile(0.5)),
+                                  'p99_ms': milliseconds(histogram.percentile(0.99)),
+                                  'sum_seconds': round(histogram.sum, 3)}
+                           for name, histogram in self.phases.items() if histogram.total},
+            }
+
+    def prometheus(self, elapsed, entries):
+        # Text exposition format, for node_exporter's textfile collector.
+        summary = self.summary(elapsed, entries)
+        lines = ['# TYPE scan_entries_total counter', f"scan_entries_total {entries}",
+                 '# TYPE scan_requests_total counter', f"scan_requests_total {summary['requests']}",
+                 '# TYPE scan_retries_total counter', f"scan_retries_total {summary['retries']}",
+                 '# TYPE scan_responses_total counter']
+        lines += [f'scan_responses_total{{status="{status}"}} {count}' for status, count in summary['statuses'].items()]
+        lines.append('# TYPE scan_errors_total counter')
+        lines += [f'scan_errors_total{{error="{error}"}} {count}' for error, count in summary['errors'].items()]
+        lines += ['# TYPE scan_bytes_total counter',
+                  f'scan_bytes_total{{direction="in"}} {summary["bytes_in"]}',
+                  f'scan_bytes_total{{direction="out"}} {summary["bytes_out"]}',
+                  '# TYPE scan_cpu_seconds_total counter', f"scan_cpu_seconds_total {summary['cpu_seconds']}",
+                  '# TYPE scan_peak_rss_bytes gauge', f"scan_peak_rss_bytes {summary['peak_rss_kb'] * 1024}",
+                  '# TYPE scan_elapsed_seconds gauge', f"scan_elapsed_seconds {elapsed:.3f}",
+                  '# TYPE scan_phase_seconds histogram']
+        with self.lock:
+            for name, histogram in self.phases.items():
+                seen = 0
+                for bucket in sorted(histogram.counts):
+                    seen += histogram.counts[bucket]
+                    lines.append(f'scan_phase_seconds_bucket{{phase="{name}",le="{bucket_edge(bucket):.6g}"}} {seen}')
+                lines += [f'scan_phase_seconds_bucket{{phase="{name}",le="+Inf"}} {histogram.total}',
+                          f'scan_phase_seconds_sum{{phase="{name}"}} {histogram.sum:.6f}',
+                          f'scan_phase_seconds_count{{phase="{name}"}} {histogram.total}']
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, elapsed, entries):
+        # Prometheus text for *.prom, JSON otherwise; replaced atomically so a
+        # collector never reads half a file.
+        if path.endswith('.prom'):
+            text = self.prometheus(elapsed, entries)
+        else:
+            text = json.dumps(self.summary(elapsed, entries), indent=2) + '\n'
+        temporary = f"{path}.tmp"
+        with self.write_lock:
+            with open(temporary, 'w') as f:
+                f.write(text)
+            os.replace(temporary, path)
@@ -0,0 +1,416 @@
+import asyncio
+import aiohttp
+import heapq
+import itertools
+from urllib.parse import urlsplit
+import signal
+import sys
+import logging
+import random
+import time
+from hostScheduler import HostScheduler
+from compiledWordlist import CHUNK_SIZE, CompiledWordlist, iter_variants, join_url
+from scanCheckpoint import ChunkTracker
+from scanFrontier import JobFeed
+from responseFingerprint import Calibrator, fingerprint
+from httpEngine import AiohttpEngine, CachedResolver, trace_config
+from scanStats import ScanStats
+
+# The worker side of a scan: everything that runs in the probing processes.
+# scanEngine imports it only once a scan starts, so the menu, the CLI and
+# the presets come up without loading aiohttp. Workers never write to the
+# terminal; progress is drawn by the parent from the shared counters.
+
+OVERLOAD_STATUS = (429, 503)
+# Failures that say nothing about the path itself, so trying it again later
+# may well get an answer.
+RETRYABLE_ERRORS = (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, OSError)
+# Retries every worker may make before its budget has built up, the longest
+# backoff and the most entries waiting for a retry at once.
+RETRY_RESERVE = 10
+RETRY_MAX_DELAY = 30.0
+MAX_RETRY_QUEUE = 10000
+
+def user_agent_picker(user_agents):
+    if not user_agents:
+        return None
+    if user_agents == 'fake':
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        return lambda: ua.random
+    return lambda: random.choice(user_agents)
+
+class ResultBuffer:
+    # Hits are kept locally and shipped to the parent in batches, so nothing
+    # crosses a process boundary per hit. The periodic flush bounds what a
+    # crashed worker can lose to one flush interval of hits. A buffer that
+    # follows another always flushes it first, so the parent never sees a
+    # chunk reported done before the hits found in it.
+    def __init__(self, result_queue, kind='found', max_size=100, follows=None):
+        self.result_queue = result_queue
+        self.kind = kind
+        self.max_size = max_size
+        self.follows = follows
+        self.items = []
+
+    def add(self, item):
+        self.items.append(item)
+        if len(self.items) >= self.max_size:
+            self.flush()
+
+    def flush(self):
+        if self.follows is not None:
+            self.follows.flush()
+        if self.items:
+            self.result_queue.put((self.kind, self.items))
+            self.items = []
+
+class StatsBuffer:
+    # Sends what the worker's ScanStats gathered since the last flush.
+    def __init__(self, result_queue, stats):
+        self.result_queue = result_queue
+        self.stats = stats
+
+    def flush(self):
+        if self.stats.requests:
+            self.result_queue.put(('stats', self.stats.drain()))
+
+class WorkerCounter:
+    # Each worker owns one slot of an unlocked shared array and is its only
+    # writer; readers sum the slots. Increments are published in batches.
+    def __init__(self, slots, index, batch_size=64):
+        self.slots = slots
+        self.index = index
+        self.batch_size = batch_size
+        self.pending = 0
+
+    def add(self, count=1):
+        self.pending += count
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.slots[self.index] += self.pending
+            self.pending = 0
+
+async def flush_periodically(buffers, interval=1.0):
+    while True:
+        await asyncio.sleep(interval)
+        for buffer in buffers:
+            buffer.flush()
+
+HEAD_REJECTED = (405, 501)
+
+class ProbeFailure:
+    # Returned by a probe that got no answer for its path, instead of a hit or
+    # a miss. reason is the error class or the overload status.
+    __slots__ = ('reason', 'retryable', 'retry_after')
+
+    def __init__(self, reason, retryable, retry_after=0):
+        self.reason = reason
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class RetryQueue:
+    # Entries whose probe failed with a retryable error wait here until their
+    # backoff has passed, retry_delay * 2 ** attempt with jitter and capped at
+    # RETRY_MAX_DELAY. Retries are held to retry_budget percent of the entries
+    # this worker has probed, so a struggling target does not get more load
+    # for failing; as every worker keeps to the same share, so does the scan.
+    # Entries that run out of attempts or budget, or fail for good, are
+    # reported as unresolved.
+    def __init__(self, config, unresolved, max_size=MAX_RETRY_QUEUE):
+        self.max_retries = config.retries
+        self.delay = config.retry_delay
+        self.budget = config.retry_budget / 100
+        self.max_size = max_size
+        self.unresolved = unresolved
+        self.entries = []
+        self.order = itertools.count()
+        self.requests = 0
+        self.retries = 0
+
+    def failed(self, host, item, failure):
+        # Returns whether the entry will be tried again.
+        job, base, base_url, directory, attempt = item
+        reason = None
+        if not failure.retryable:
+            reason = failure.reason
+        elif attempt >= self.max_retries:
+            reason = f"{failure.reason} ({attempt + 1} attempts)"
+        elif self.retries >= RETRY_RESERVE + self.budget * self.requests:
+            reason = f"{failure.reason} (retry budget used up)"
+        elif len(self.entries) >= self.max_size:
+            reason = f"{failure.reason} (retry queue full)"
+        if reason is not None:
+            self.unresolved.add((join_url(base_url, directory), reason))
+            return False
+        self.retries += 1
+        delay = min(RETRY_MAX_DELAY, max(self.delay * 2 ** attempt * random.uniform(0.5, 1.0), failure.retry_after))
+        heapq.heappush(self.entries, (time.monotonic() + delay, next(self.order), host,
+                                      (job, base, base_url, directory, attempt + 1)))
+        return True
+
+    def due(self):
+        # Pops the next entry whose backoff has passed, None if there is none.
+        if self.entries and self.entries[0][0] <= time.monotonic():
+            _, _, host, item = heapq.heappop(self.entries)
+            return host, item
+        return None
+
+class Prober:
+    def __init__(self, engine, config, calibrator=None, stats=None, errors=None):
+        self.engine = engine
+        self.config = config
+        self.calibrator = calibrator
+        self.stats = stats
+        # Shared counter the parent's progress line reads the error rate from.
+        self.errors = errors
+        self.pick_user_agent = user_agent_picker(config.user_agents)
+        self.head_rejected = set()
+
+    def method_for(self, host, profile):
+        # HEAD only helps when the status alone can tell a miss from a hit.
+        if not self.config.head_first or host in self.head_rejected:
+            return 'GET'
+        if profile is not None and profile.hides_misses_in(self.config.found_status):
+            return 'GET'
+        return 'HEAD'
+
+    async def check(self, host, base_url, directory, limiter):
+        # The caller holds a slot of the host's limiter for the whole check.
+        url = join_url(base_url, directory)
+        profile = await self.calibrator.profile(base_url, directory) if self.calibrator else None
+        method = self.method_for(host, profile)
+        found = await self.request(method, host, url, profile, limiter)
+        if found is None:
+            found = await self.request('GET', host, url, profile, limiter)
+        return found or None
+
+    def wants_body(self, status, location):
+        # Bodies of found_status responses are read, for the soft-404 check
+        # and the fingerprint written with every hit.
+        return status in self.config.found_status
+
+    def hit(self, method, url, response, started, fp=None):
+        if fp is None and response.body is not None:
+            fp = fingerprint(response.status, response.location, response.body, urlsplit(url).path)
+        size = response.length
+        if size is None and response.body is not None:
+            size = len(response.body)
+        record = {'url': url, 'status': response.status, 'method': method, 'size': size,
+                  'location': response.location, 'fingerprint': fp[3].hex() if fp else None,
+                  'latency_ms': round((time.monotonic() - started) * 1000, 1), 'time': round(time.time(), 3)}
+        if response.etag:
+            record['etag'] = response.etag
+        if response.last_modified:
+            record['last_modified'] = response.last_modified
+        return record
+
+    async def request(self, method, host, url, profile, limiter):
+        # The hit record for a hit, False for a miss, None when a GET is
+        # needed to decide and a ProbeFailure when there was no answer.
+        config = self.config
+        headers = config.headers
+        if self.pick_user_agent:
+            headers = dict(headers, **{'User-Agent': self.pick_user_agent()})
+        found_status = config.found_status
+        started = time.monotonic()
+        overloaded = False
+        try:
+            response = await self.engine.fetch(method, url, headers, self.wants_body)
+            if self.stats is not None:
+                self.stats.status(response.status)
+            if response.status in OVERLOAD_STATUS and response.status not in found_status:
+                overloaded = True
+                limiter.pause(response.retry_after)
+                # An error for the progress line too; the stats have the status.
+                if self.errors is not None:
+                    self.errors.add()
+                return ProbeFailure(f"HTTP {response.status}", True, response.retry_after)
+            if method == 'HEAD' and response.status in HEAD_REJECTED:
+                self.head_rejected.add(host)
+                return None
+            if response.status not in found_status:
+                return False
+            if profile is None or not profile.needs_body(response.status, response.location):
+                return self.hit(method, url, response, started)
+            if method == 'HEAD':
+                return None
+            fp = fingerprint(response.status, response.location, response.body, urlsplit(url).path)
+            if profile.matches(fp):
+                return False
+            return self.hit(method, url, response, started, fp)
+        except RETRYABLE_ERRORS as e:
+            overloaded = True
+            return self.failed(url, e, True)
+        except Exception as e:
+            return self.failed(url, e, False)
+        finally:
+            latency = time.monotonic() - started
+            limiter.observe(overloaded, latency)
+            if self.stats is not None:
+                self.stats.observe(latency)
+
+    def failed(self, url, exc, retryable):
+        if self.stats is not None:
+            self.stats.error(exc)
+        if self.errors is not None:
+            self.errors.add()
+        if self.config.log_errors:
+            logging.error(f"Error checking {url}: {str(exc)}")
+        return ProbeFailure(type(exc).__name__, retryable)
+
+async def scan_worker(scheduler, prober, results, tracker, counter, retries):
+    while True:
+        entry = await scheduler.get()
+        if entry is None:
+            return
+        host, item = entry
+        job, base, base_url, directory, attempt = item
+        if not attempt:
+            retries.requests += 1
+        try:
+            found = await prober.check(host, base_url, directory, scheduler.limiter(host))
+        finally:
+            scheduler.release(host)
+        if isinstance(found, ProbeFailure):
+            # A retried entry stays outstanding, so its job is not reported
+            # done and a resume probes it again.
+            if retries.failed(host, item, found):
+                if prober.stats is not None:
+                    prober.stats.retry()
+                continue
+        elif found:
+            found['base'] = base_url
+            results.add((found['url'], base, job, found))
+        tracker.finished(job)
+        counter.add()
+
+async def watch_interrupt(interrupt_event):
+    while not interrupt_event.is_set():
+        await asyncio.sleep(0.2)
+
+async def feed_scheduler(scheduler, wordlist, suffixes, jobs, tracker, counter):
+    # Workers pull the next job whenever they run short of entries, so fast
+    # workers keep taking work until the frontier is exhausted.
+    num_chunks = wordlist.num_chunks()
+    while True:
+        await scheduler.wait_for_room()
+        item = await jobs.get()
+        if item is None:
+            break
+        job, base_url, count = item
+        base, chunk = divmod(job, num_chunks)
+        host = urlsplit(base_url).netloc
+        for word in wordlist.iter_range(chunk * CHUNK_SIZE, min((chunk + 1) * CHUNK_SIZE, count)):
+            for directory in iter_variants(word, suffixes):
+                if directory is None:
+                    counter.add()
+                    continue
+                tracker.dispatched(job)
+                scheduler.put(host, (job, base, base_url, directory, 0))
+        tracker.seal(job)
+
+async def feed_retries(scheduler, retries, tracker, feeder, interval=0.2):
+    # Retries are low priority: a due entry is queued only while the
+    # scheduler has room, behind the entries already waiting for its host.
+    # Once the feeder is done and every job it took is done, nothing can come
+    # back for a retry and the scheduler is closed.
+    while not (feeder.done() and not tracker.outstanding):
+        while scheduler.wants_items():
+            entry = retries.due()
+            if entry is None:
+                break
+            scheduler.put(*entry)
+        await asyncio.sleep(interval)
+    scheduler.close()
+
+async def scan_directories(wordlist, jobs, config, results, tracker, counter, errors, unresolved, interrupt_event,
+                           stats=None, dns=None):
+    # A fixed pool of workers takes entries from the per-host scheduler, so only
+    # max_concurrent requests (plus a small read-ahead) exist at any time,
+    # whatever the wordlist size. Each host's limiter decides how many of those
+    # workers may have a request in flight to it. The same session and workers
+    # carry on from one target and frontier level to the next.
+    per_host = config.max_concurrent
+    if config.per_host_concurrent:
+        per_host = min(per_host, max(1, config.per_host_concurrent // config.num_processes))
+    scheduler = HostScheduler(per_host, config.min_concurrent,
+                              config.initial_concurrent, read_ahead=config.max_concurrent * 2)
+    # With the parent's DNS cache, addresses are looked up in shared memory
+    # whenever a connection opens, so aiohttp's own per-process cache is off.
+    resolver = CachedResolver(dns) if dns is not None else None
+    if resolver is not None:
+        connector = aiohttp.TCPConnector(limit=config.max_concurrent, ssl=False, resolver=resolver,
+                                         use_dns_cache=False)
+    else:
+        connector = aiohttp.TCPConnector(limit=config.max_concurrent, ssl=False, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=config.timeout)
+    # Per-phase timing costs a little per request, so it is only taken when
+    # the stats are written out.
+    timed = stats if config.stats_file else None
+    trace_configs = [trace_config(stats)] if timed else None
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs) as session:
+        engine = AiohttpEngine(session, config.allow_redirects, config.max_body, timed)
+        if config.engine == 'raw':
+            from rawHttp import RawEngine
+            engine = RawEngine(engine, config.allow_redirects, config.max_body, config.timeout,
+                               config.max_concurrent, config.pipeline, timed, dns)
+        calibrator = Calibrator(engine, config.headers) if config.calibrate else None
+        prober = Prober(engine, config, calibrator, stats, errors)
+        retries = RetryQueue(config, unresolved)
+        workers = [scan_worker(scheduler, prober, results, tracker, counter, retries)
+                   for _ in range(config.max_concurrent)]
+        feeder = asyncio.ensure_future(feed_scheduler(scheduler, wordlist, config.suffixes, jobs, tracker, counter))
+        scan = asyncio.gather(feeder, feed_retries(scheduler, retries, tracker, feeder), *workers)
+        watcher = asyncio.create_task(watch_interrupt(interrupt_event))
+        buffers = [results, tracker.done_buffer, counter, errors]
+        if stats is not None:
+            buffers.append(StatsBuffer(results.result_queue, stats))
+        flusher = asyncio.create_task(flush_periodically(buffers))
+        try:
+            await asyncio.wait([scan, watcher], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            scan.cancel()
+            watcher.cancel()
+            flusher.cancel()
+            await asyncio.gather(scan, watcher, flusher, return_exceptions=True)
+            await engine.close()
+            if resolver is not None:
+                await resolver.close()
+            for host, limiter in scheduler.limiters.items():
+                logging.debug(f"Concurrency for {host} settled at {int(limiter.limit)} (latency {limiter.latency})")
+
+def use_event_loop(name):
+    if name == 'uvloop':
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    elif sys.platform.startswith('win'):
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+def worker(index, job_queue, wordlist_path, config, result_queue, scanned_counts, error_counts, interrupt_event,
+           dns=None):
+    # Only the parent reacts to Ctrl-C; children stop through interrupt_event.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    use_event_loop(config.event_loop)
+    results = ResultBuffer(result_queue)
+    # Unresolved paths reach the parent before the jobs they belong to are done.
+    unresolved = ResultBuffer(result_queue, 'unresolved', follows=results)
+    tracker = ChunkTracker(ResultBuffer(result_queue, 'done', follows=unresolved))
+    counter = WorkerCounter(scanned_counts, index)
+    errors = WorkerCounter(error_counts, index)
+    stats = ScanStats()
+    try:
+        wordlist = CompiledWordlist(wordlist_path)
+        asyncio.run(scan_directories(wordlist, JobFeed(job_queue), config, results, tracker, counter, errors,
+                                     unresolved, interrupt_event, stats, dns))
+    except asyncio.CancelledError:
+        pass
+    finally:
+        results.flush()
+        tracker.done_buffer.flush()
+        counter.flush()
+        errors.flush()
+        result_queue.put(('stats', stats.drain()))
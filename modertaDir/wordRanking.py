@@ -0,0 +1,135 @@
+import glob
+import json
+import logging
+import os
+import sys
+from itertools import chain
+from urllib.parse import urlsplit
+from compiledWordlist import CompiledWordlist, ensure_compiled, write_compiled
+
+RANKING_FILE = 'wordlist_stats.json'
+RESULT_FILES = 'found_directories*'
+EXTENSION = '.ranked.dwl'
+
+def hit_words(url):
+    # Every entry that could have produced the hit when joined to some base:
+    # 'a/b/c' below the target, 'b/c' below a/ and 'c' below a/b/.
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    return ['/'.join(segments[index:]) for index in range(len(segments))]
+
+def hit_url(line):
+    # Lines of the JSON lines output are records, older result files hold
+    # one URL per line. Anything else, like the "<url> <reason>" lines of
+    # unresolved paths once written under the same prefix, is skipped.
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            return json.loads(line).get('url')
+        except ValueError:
+            return None
+    return line if line and len(line.split()) == 1 else None
+
+class HitStats:
+    # Hit counts per wordlist entry over all past results files. Result files
+    # are only appended to, so each one is read on from the offset the last
+    # update stopped at; a file that shrank was replaced and is read again.
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.counts = {}
+
+    @classmethod
+    def load(cls, path):
+        stats = cls(path)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            stats.files = state['files']
+            stats.counts = state['counts']
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logging.error(f"File {path} tidak bisa dibaca, statistik dihitung ulang: {str(e)}")
+        return stats
+
+    def update(self, pattern=RESULT_FILES):
+        # Returns whether anything new was read.
+        changed = False
+        for filename in sorted(glob.glob(pattern)):
+            size = os.path.getsize(filename)
+            offset = self.files.get(filename, 0)
+            if size < offset:
+                offset = 0
+            if size == offset:
+                continue
+            with open(filename, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            # A JSON lines file may be in the middle of a write; its last
+            # line is left for the next update until it is complete.
+            end = data.rfind(b'\n') + 1 if filename.endswith('.jsonl') else len(data)
+            for line in data[:end].decode('utf-8', 'replace').splitlines():
+                url = hit_url(line)
+                if url:
+                    for word in hit_words(url):
+                        self.counts[word] = self.counts.get(word, 0) + 1
+            self.files[filename] = offset + end
+            changed = True
+        return changed
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'files': self.files, 'counts': self.counts}, f)
+        os.replace(tmp, self.path)
+
+    def score(self, word):
+        return self.counts.get(word.rstrip('/'), 0)
+
+def ranked_path(compiled):
+    return os.path.splitext(compiled)[0] + EXTENSION
+
+def rank_wordlist(compiled, stats, output=None):
+    # Scored entries go first, highest score first; the rest keep their order.
+    output = output or ranked_path(compiled)
+    wordlist = CompiledWordlist(compiled)
+    try:
+        scored = []
+        for index in range(len(wordlist)):
+            score = stats.score(wordlist[index])
+            if score:
+                scored.append((-score, index))
+        scored.sort()
+        front = {index for _, index in scored}
+        entries = chain((wordlist.raw(index) for _, index in scored),
+                        (wordlist.raw(index) for index in range(len(wordlist)) if index not in front))
+        write_compiled(entries, output)
+    finally:
+        wordlist.close()
+    logging.info(f"Ranked {compiled}: {len(scored)} entries with past hits first -> {output}")
+    return output
+
+def ensure_ranked(compiled, stats_path, refresh=True):
+    # The wordlist to scan: the ranked copy, or compiled itself while nothing
+    # has been scored. Without refresh an existing ranked copy is kept as it
+    # is, so a resumed scan sees the same order its checkpoint refers to.
+    stats = HitStats.load(stats_path)
+    if refresh and stats.update():
+        stats.save()
+    output = ranked_path(compiled)
+    if not stats.counts:
+        return compiled
+    if os.path.exists(output) and (not refresh or os.path.getmtime(output) >=
+                                   max(os.path.getmtime(stats_path), os.path.getmtime(compiled))):
+        return output
+    return rank_wordlist(compiled, stats, output)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    stats = HitStats.load(RANKING_FILE)
+    if stats.update():
+        stats.save()
+    for filename in sys.argv[1:]:
+        rank_wordlist(ensure_compiled(filename), stats)
+    for word, count in sorted(stats.counts.items(), key=lambda item: -item[1])[:20]:
+        print(f"{count}\t{word}")